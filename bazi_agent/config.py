@@ -1,227 +1,272 @@
-"""
-配置管理模块
-负责加载、验证和管理配置文件
-"""
-
-import json
-import os
-from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
-from pydantic import BaseModel, Field
-from loguru import logger
-
-from .exceptions import InvalidConfigError, ConfigNotFoundError
-
-
-class BirthConfig(BaseModel):
-    """出生信息配置"""
-    year: int = Field(..., ge=1900, le=2100, description="出生年份")
-    month: int = Field(..., ge=1, le=12, description="出生月份")
-    day: int = Field(..., ge=1, le=31, description="出生日期")
-    hour: int = Field(..., ge=0, le=23, description="出生小时")
-    minute: int = Field(default=0, ge=0, le=59, description="出生分钟")
-
-
-class LocationConfig(BaseModel):
-    """地理位置配置"""
-    province: Optional[str] = None
-    city: Optional[str] = None
-    longitude: Optional[float] = Field(None, ge=-180, le=180)
-    latitude: Optional[float] = Field(None, ge=-90, le=90)
-    use_true_solar_time: bool = False
-    
-    class Config:
-        # 允许字段缺失
-        extra = "allow"
-
-
-class UserConfig(BaseModel):
-    """用户信息配置"""
-    name: str
-    gender: str = Field(..., pattern="^(男|女)$")
-    birth: BirthConfig
-    location: Optional[LocationConfig] = None
-
-
-class LLMConfig(BaseModel):
-    """LLM配置"""
-    provider: str = Field(..., pattern="^(anthropic|openai|custom|yunwu)$")
-    api_key: str
-    model: str
-    temperature: float = Field(default=0.7, ge=0, le=1)
-    max_tokens: int = Field(default=4000, ge=1, le=100000)
-    timeout: int = Field(default=60, ge=1)
-    max_retries: int = Field(default=3, ge=0)
-    retry_delay: int = Field(default=2, ge=0)
-    base_url: Optional[str] = None
-    system_prompt: Optional[str] = None
-    
-    class Config:
-        # 允许字段缺失（某些配置可能没有timeout等字段）
-        extra = "allow"
-
-
-class AnalysisConfig(BaseModel):
-    """分析配置"""
-    dimensions: Optional[list] = None
-    include_llm_interpretation: bool = True
-    llm_interpretation_level: str = Field(
-        default="detailed",
-        pattern="^(simple|normal|detailed|comprehensive)$"
-    )
-
-
-class JSONOutputConfig(BaseModel):
-    """JSON输出配置"""
-    enabled: bool = True
-    filepath: str = "./output/result.json"
-    pretty: bool = True
-    include_raw_data: bool = True
-
-
-class CSVOutputConfig(BaseModel):
-    """CSV输出配置"""
-    enabled: bool = True
-    filepath: str = "./output/result.csv"
-    encoding: str = "utf-8-sig"
-
-
-class LoggingConfig(BaseModel):
-    """日志配置"""
-    level: str = Field(default="INFO", pattern="^(DEBUG|INFO|WARNING|ERROR|CRITICAL)$")
-    filepath: str = "./logs/bazi_agent.log"
-
-
-class OutputConfig(BaseModel):
-    """输出配置"""
-    json: JSONOutputConfig = Field(default_factory=JSONOutputConfig, alias="json")
-    csv: CSVOutputConfig = CSVOutputConfig()
-    logging: LoggingConfig = LoggingConfig()
-    
-    class Config:
-        # 允许字段名与父类属性同名
-        populate_by_name = True
-        protected_namespaces = ()
-        # 解决json字段警告
-        json_encoders = {
-            # 自定义JSON编码器
-        }
-
-
-class Config(BaseModel):
-    """完整配置模型"""
-    user: UserConfig
-    llm: LLMConfig
-    analysis: AnalysisConfig = AnalysisConfig()
-    output: OutputConfig = OutputConfig()
-
-    class Config:
-        extra = "forbid"
-
-
-class ConfigLoader:
-    """配置加载器"""
-    
-    @staticmethod
-    def load_from_file(config_path: str) -> Config:
-        """
-        从文件加载配置
-        
-        Args:
-            config_path: 配置文件路径
-            
-        Returns:
-            Config对象
-            
-        Raises:
-            ConfigNotFoundError: 配置文件不存在
-            InvalidConfigError: 配置格式错误
-        """
-        path = Path(config_path)
-        if not path.exists():
-            raise ConfigNotFoundError(f"配置文件不存在: {config_path}")
-        
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                config_dict = json.load(f)
-        except json.JSONDecodeError as e:
-            raise InvalidConfigError(f"配置文件JSON格式错误: {e}")
-        except Exception as e:
-            raise InvalidConfigError(f"读取配置文件失败: {e}")
-        
-        return ConfigLoader.load_from_dict(config_dict)
-    
-    @staticmethod
-    def load_from_dict(config_dict: Dict[str, Any]) -> Config:
-        """
-        从字典加载配置
-        
-        Args:
-            config_dict: 配置字典
-            
-        Returns:
-            Config对象
-            
-        Raises:
-            InvalidConfigError: 配置格式错误
-        """
-        try:
-            config = Config(**config_dict)
-            ConfigLoader._validate(config)
-            return config
-        except Exception as e:
-            raise InvalidConfigError(f"配置验证失败: {e}")
-    
-    @staticmethod
-    def _validate(config: Config) -> None:
-        """
-        验证配置的合理性
-        
-        Args:
-            config: 配置对象
-        """
-        # 验证日期合法性
-        try:
-            from datetime import datetime
-            datetime(
-                config.user.birth.year,
-                config.user.birth.month,
-                config.user.birth.day
-            )
-        except ValueError as e:
-            raise InvalidConfigError(f"日期不合法: {e}")
-        
-        # 验证真太阳时配置
-        if config.user.location and config.user.location.use_true_solar_time:
-            if not config.user.location.longitude or not config.user.location.latitude:
-                if not config.user.location.province and not config.user.location.city:
-                    logger.warning("启用真太阳时但未提供经纬度或省市信息，将使用默认北京时间")
-                else:
-                    logger.info("启用真太阳时，将根据省市信息查找经纬度")
-        
-        # 验证输出目录
-        if config.output.json.enabled:
-            output_dir = Path(config.output.json.filepath).parent
-            output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 验证日志目录
-        log_dir = Path(config.output.logging.filepath).parent
-        log_dir.mkdir(parents=True, exist_ok=True)
-
-
-def validate_config(config_path: str) -> Tuple[bool, Optional[str]]:
-    """
-    验证配置文件是否合法
-    
-    Args:
-        config_path: 配置文件路径
-        
-    Returns:
-        (是否合法, 错误信息)
-    """
-    try:
-        ConfigLoader.load_from_file(config_path)
-        return True, None
-    except Exception as e:
-        return False, str(e)
-
+"""
+配置管理模块
+负责加载、验证和管理配置文件
+"""
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Literal, Optional, Tuple
+from pydantic import BaseModel, Field
+from loguru import logger
+
+from .exceptions import InvalidConfigError, ConfigNotFoundError
+
+# 可选使用 orjson（C 扩展，解析明显快于标准库），未安装时退回 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class BirthConfig(BaseModel):
+    """出生信息配置"""
+    year: int = Field(..., ge=1900, le=2100, description="出生年份")
+    month: int = Field(..., ge=1, le=12, description="出生月份")
+    day: int = Field(..., ge=1, le=31, description="出生日期")
+    hour: int = Field(..., ge=0, le=23, description="出生小时")
+    minute: int = Field(default=0, ge=0, le=59, description="出生分钟")
+
+
+class LocationConfig(BaseModel):
+    """地理位置配置"""
+    province: Optional[str] = None
+    city: Optional[str] = None
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    use_true_solar_time: bool = False
+    
+    class Config:
+        # 允许字段缺失
+        extra = "allow"
+
+
+class UserConfig(BaseModel):
+    """用户信息配置"""
+    name: str
+    gender: Literal["男", "女"]
+    birth: BirthConfig
+    location: Optional[LocationConfig] = None
+
+
+class LLMConfig(BaseModel):
+    """LLM配置"""
+    provider: Literal["anthropic", "openai", "custom", "yunwu"]
+    api_key: str
+    model: str
+    temperature: float = Field(default=0.7, ge=0, le=1)
+    max_tokens: int = Field(default=4000, ge=1, le=100000)
+    timeout: int = Field(default=60, ge=1)
+    max_retries: int = Field(default=3, ge=0)
+    retry_delay: int = Field(default=2, ge=0)
+    max_retry_delay: int = Field(default=60, ge=1, description="单次重试等待的上限秒数")
+    retry_jitter: float = Field(default=1.0, ge=0, description="重试等待叠加的随机抖动秒数上限")
+    rpm: Optional[int] = Field(default=None, ge=1, description="客户端限速：每分钟请求数上限")
+    tpm: Optional[int] = Field(default=None, ge=1, description="客户端限速：每分钟token数上限")
+    max_connections: int = Field(default=20, ge=1, description="共享httpx连接池的最大连接数")
+    max_keepalive: int = Field(default=10, ge=0, description="共享httpx连接池保持的空闲长连接数")
+    base_url: Optional[str] = None
+    system_prompt: Optional[str] = None
+    cache_ttl: int = Field(default=0, ge=0, description="temperature=0时响应缓存的存活秒数，0表示进程内不过期")
+    async_mode: bool = Field(default=False, description="创建异步客户端，配合agenerate_interpretation并发调用")
+    batch_size: int = Field(default=10, ge=1, description="批量生成解读时的并发上限")
+    semantic_cache_enabled: bool = Field(default=False, description="开启语义响应缓存(需安装sentence-transformers)")
+    semantic_threshold: float = Field(default=0.95, ge=0, le=1, description="语义缓存命中的最低余弦相似度")
+    embedding_model: str = Field(default="paraphrase-multilingual-MiniLM-L12-v2", description="语义缓存使用的嵌入模型")
+    cascade_enabled: bool = Field(default=False, description="启用模型级联：先试small_model，响应不合格再升级")
+    small_model: Optional[str] = Field(default=None, description="级联首选的低成本模型")
+    cascade_min_length: int = Field(default=200, ge=0, description="小模型响应视为合格的最小字符数")
+    
+    class Config:
+        # 允许字段缺失（某些配置可能没有timeout等字段）
+        extra = "allow"
+
+
+class AnalysisConfig(BaseModel):
+    """分析配置"""
+    dimensions: Optional[list] = None
+    include_llm_interpretation: bool = True
+    llm_interpretation_level: Literal[
+        "simple", "normal", "detailed", "comprehensive"
+    ] = "detailed"
+    max_output_tokens: Optional[int] = Field(default=None, ge=1, description="覆盖按解读级别推导的输出token上限")
+
+
+class JSONOutputConfig(BaseModel):
+    """JSON输出配置"""
+    enabled: bool = True
+    filepath: str = "./output/result.json"
+    pretty: bool = True
+    include_raw_data: bool = True
+
+
+class CSVOutputConfig(BaseModel):
+    """CSV输出配置"""
+    enabled: bool = True
+    filepath: str = "./output/result.csv"
+    encoding: str = "utf-8-sig"
+
+
+class JSONLOutputConfig(BaseModel):
+    """JSONL追加输出配置（批量流水线用，每个结果追加一行）"""
+    enabled: bool = False
+    filepath: str = "./output/results.jsonl"
+
+
+class LoggingConfig(BaseModel):
+    """日志配置"""
+    level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    filepath: str = "./logs/bazi_agent.log"
+
+
+class OutputConfig(BaseModel):
+    """输出配置"""
+    json: JSONOutputConfig = Field(default_factory=JSONOutputConfig, alias="json")
+    csv: CSVOutputConfig = CSVOutputConfig()
+    jsonl: JSONLOutputConfig = JSONLOutputConfig()
+    logging: LoggingConfig = LoggingConfig()
+    
+    class Config:
+        # 允许字段名与父类属性同名
+        populate_by_name = True
+        protected_namespaces = ()
+        # 解决json字段警告
+        json_encoders = {
+            # 自定义JSON编码器
+        }
+
+
+class Config(BaseModel):
+    """完整配置模型"""
+    user: UserConfig
+    llm: LLMConfig
+    analysis: AnalysisConfig = AnalysisConfig()
+    output: OutputConfig = OutputConfig()
+
+    class Config:
+        extra = "forbid"
+
+
+class ConfigLoader:
+    """配置加载器"""
+    
+    @staticmethod
+    def load_from_file(config_path: str) -> Config:
+        """
+        从文件加载配置
+        
+        Args:
+            config_path: 配置文件路径
+            
+        Returns:
+            Config对象
+            
+        Raises:
+            ConfigNotFoundError: 配置文件不存在
+            InvalidConfigError: 配置格式错误
+        """
+        path = Path(config_path)
+        if not path.exists():
+            raise ConfigNotFoundError(f"配置文件不存在: {config_path}")
+        
+        # 以 (绝对路径, 修改时间, 大小) 为键缓存，文件未变时不重复解析校验
+        stat = path.stat()
+        config = _load_config_cached(str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        # 返回副本，避免调用方改动缓存中的实例
+        return config.model_copy(deep=True)
+    
+    @staticmethod
+    def load_from_dict(config_dict: Dict[str, Any]) -> Config:
+        """
+        从字典加载配置
+        
+        Args:
+            config_dict: 配置字典
+            
+        Returns:
+            Config对象
+            
+        Raises:
+            InvalidConfigError: 配置格式错误
+        """
+        try:
+            # model_validate 走 pydantic-core 的 Rust 校验路径
+            config = Config.model_validate(config_dict)
+            ConfigLoader._validate(config)
+            return config
+        except Exception as e:
+            raise InvalidConfigError(f"配置验证失败: {e}")
+    
+    @staticmethod
+    def _validate(config: Config) -> None:
+        """
+        验证配置的合理性
+        
+        Args:
+            config: 配置对象
+        """
+        # 验证日期合法性
+        try:
+            from datetime import datetime
+            datetime(
+                config.user.birth.year,
+                config.user.birth.month,
+                config.user.birth.day
+            )
+        except ValueError as e:
+            raise InvalidConfigError(f"日期不合法: {e}")
+        
+        # 验证真太阳时配置
+        if config.user.location and config.user.location.use_true_solar_time:
+            if not config.user.location.longitude or not config.user.location.latitude:
+                if not config.user.location.province and not config.user.location.city:
+                    logger.warning("启用真太阳时但未提供经纬度或省市信息，将使用默认北京时间")
+                else:
+                    logger.info("启用真太阳时，将根据省市信息查找经纬度")
+        
+        # 验证输出目录
+        if config.output.json.enabled:
+            output_dir = Path(config.output.json.filepath).parent
+            output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 验证日志目录
+        log_dir = Path(config.output.logging.filepath).parent
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+
+@lru_cache(maxsize=64)
+def _load_config_cached(abs_path: str, mtime_ns: int, size: int) -> Config:
+    """解析并校验配置文件（mtime_ns/size 仅作缓存键，文件变动后自动失效）"""
+    path = Path(abs_path)
+    try:
+        if orjson is not None:
+            config_dict = orjson.loads(path.read_bytes())
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                config_dict = json.load(f)
+    except (json.JSONDecodeError, ValueError) as e:
+        # orjson.JSONDecodeError 是 ValueError 的子类
+        raise InvalidConfigError(f"配置文件JSON格式错误: {e}")
+    except Exception as e:
+        raise InvalidConfigError(f"读取配置文件失败: {e}")
+    
+    return ConfigLoader.load_from_dict(config_dict)
+
+
+def validate_config(config_path: str) -> Tuple[bool, Optional[str]]:
+    """
+    验证配置文件是否合法
+    
+    Args:
+        config_path: 配置文件路径
+        
+    Returns:
+        (是否合法, 错误信息)
+    """
+    try:
+        ConfigLoader.load_from_file(config_path)
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
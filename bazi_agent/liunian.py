@@ -1,261 +1,319 @@
-"""
-流年分析模块
-负责流年的计算和分析
-"""
-
-from typing import Dict, Any, List, Optional
-from lunar_python import Solar
-from loguru import logger
-
-from .exceptions import CalculationError
-
-
-class LiunianAnalyzer:
-    """流年分析器"""
-    
-    def __init__(self):
-        # 五行生克关系
-        self.wuxing_shengke = {
-            '生': {
-                '木': '火', '火': '土', '土': '金', 
-                '金': '水', '水': '木'
-            },
-            '克': {
-                '木': '土', '火': '金', '土': '水',
-                '金': '木', '水': '火'
-            }
-        }
-        
-        # 天干五行
-        self.tiangan_wuxing = {
-            '甲': '木', '乙': '木',
-            '丙': '火', '丁': '火',
-            '戊': '土', '己': '土',
-            '庚': '金', '辛': '金',
-            '壬': '水', '癸': '水'
-        }
-        
-        # 地支五行
-        self.dizhi_wuxing = {
-            '子': '水', '亥': '水',
-            '寅': '木', '卯': '木',
-            '巳': '火', '午': '火',
-            '申': '金', '酉': '金',
-            '辰': '土', '戌': '土', '丑': '土', '未': '土'
-        }
-        
-        # 六冲
-        self.liuchong = {
-            '子': '午', '午': '子',
-            '丑': '未', '未': '丑',
-            '寅': '申', '申': '寅',
-            '卯': '酉', '酉': '卯',
-            '辰': '戌', '戌': '辰',
-            '巳': '亥', '亥': '巳'
-        }
-    
-    def get_liunian_info(self, year: int) -> Dict[str, Any]:
-        """获取流年信息"""
-        try:
-            solar = Solar.fromYmd(year, 1, 1)
-            lunar = solar.getLunar()
-            
-            year_gan = lunar.getYearGan()
-            year_zhi = lunar.getYearZhi()
-            year_ganzhi = lunar.getYearInGanZhi()
-            
-            return {
-                'year': year,
-                'ganzhi': year_ganzhi,
-                'gan': year_gan,
-                'zhi': year_zhi,
-                'gan_wuxing': self.tiangan_wuxing.get(year_gan, ''),
-                'zhi_wuxing': self.dizhi_wuxing.get(year_zhi, '')
-            }
-        except Exception as e:
-            logger.error(f"获取流年信息失败: {e}")
-            raise CalculationError(f"获取流年信息失败: {e}")
-    
-    def analyze_liunian_yongshen(self, liunian_wuxing: str, yongshen_wuxing: str) -> Dict[str, Any]:
-        """分析流年与用神关系"""
-        # 判断生克关系
-        if self.wuxing_shengke['生'].get(liunian_wuxing) == yongshen_wuxing:
-            return {
-                'relation': '流年生用神',
-                'jixi': '大吉',
-                'degree': 5,
-                'description': '用神得力,运势极佳,贵人相助,事业顺利',
-                'tags': ['运势极佳', '贵人相助', '事业顺利']
-            }
-        elif self.wuxing_shengke['克'].get(liunian_wuxing) == yongshen_wuxing:
-            return {
-                'relation': '流年克用神',
-                'jixi': '大凶',
-                'degree': 1,
-                'description': '用神受制,运势低迷,事业受阻,易有灾祸',
-                'tags': ['运势差', '多阻碍', '诸事不顺']
-            }
-        elif liunian_wuxing == yongshen_wuxing:
-            return {
-                'relation': '流年助用神',
-                'jixi': '吉',
-                'degree': 4,
-                'description': '用神增强,运势上升,得朋友帮助',
-                'tags': ['运势良好', '朋友相助']
-            }
-        elif self.wuxing_shengke['生'].get(yongshen_wuxing) == liunian_wuxing:
-            return {
-                'relation': '流年泄用神',
-                'jixi': '小凶',
-                'degree': 2,
-                'description': '用神力量被泄,消耗较多,付出多收获少',
-                'tags': ['消耗大', '付出多']
-            }
-        else:
-            return {
-                'relation': '无特殊关系',
-                'jixi': '平',
-                'degree': 3,
-                'description': '运势平稳',
-                'tags': ['运势平稳']
-            }
-    
-    def check_chong(self, bazi_sizhu_zhi: List[str], liunian_zhi: str) -> List[Dict[str, Any]]:
-        """检查流年是否冲命局"""
-        chong_list = []
-        positions = ['年柱', '月柱', '日柱', '时柱']
-        
-        logger.debug(f"检查冲关系: 命局四柱地支={bazi_sizhu_zhi}, 流年地支={liunian_zhi}")
-        
-        for i, zhi in enumerate(bazi_sizhu_zhi):
-            chong_zhi = self.liuchong.get(zhi)
-            if chong_zhi == liunian_zhi:
-                importance = '最高' if i == 2 else ('高' if i == 1 else '中')
-                logger.debug(f"发现冲: {positions[i]}({zhi}) 被流年({liunian_zhi})冲")
-                chong_list.append({
-                    'position': positions[i],
-                    'chong_zhi': zhi,
-                    'importance': importance,
-                    'description': self._get_chong_description(positions[i])
-                })
-            else:
-                logger.debug(f"无冲: {positions[i]}({zhi}) -> 冲支({chong_zhi}) != 流年({liunian_zhi})")
-        
-        if not chong_list:
-            logger.debug(f"流年({liunian_zhi})与命局四柱无冲关系")
-        
-        return chong_list
-    
-    def _get_chong_description(self, position: str) -> str:
-        """获取冲的描述"""
-        descriptions = {
-            '年柱': '父母、祖辈有变动,可能搬迁或家庭变化',
-            '月柱': '工作变动、跳槽、升职降职、兄弟姐妹事',
-            '日柱': '婚姻变动、离婚、结婚、配偶健康、搬家',
-            '时柱': '子女事、生育、子女离家、晚年变动'
-        }
-        return descriptions.get(position, '')
-    
-    def analyze_liunian(self, year: int, bazi: Dict[str, Any], 
-                       yongshen_wuxing: List[str], jishen_wuxing: List[str]) -> Dict[str, Any]:
-        """
-        综合分析流年
-        
-        参数:
-        - year: 流年年份
-        - bazi: 八字四柱 {'nian_zhu': {'dizhi': ''}, ...}
-        - yongshen_wuxing: 用神五行列表
-        - jishen_wuxing: 忌神五行列表
-        """
-        try:
-            # 1. 获取流年信息
-            liunian = self.get_liunian_info(year)
-            
-            # 2. 分析与用神关系(取第一个用神)
-            yongshen_wx = yongshen_wuxing[0] if yongshen_wuxing else ''
-            yongshen_result = self.analyze_liunian_yongshen(
-                liunian['gan_wuxing'], 
-                yongshen_wx
-            ) if yongshen_wx else {
-                'relation': '无特殊关系',
-                'jixi': '平',
-                'degree': 3,
-                'description': '运势平稳',
-                'tags': ['运势平稳']
-            }
-            
-            # 3. 分析与忌神关系(取第一个忌神)
-            jishen_wx = jishen_wuxing[0] if jishen_wuxing else ''
-            jishen_relation = self.analyze_liunian_yongshen(
-                liunian['gan_wuxing'],
-                jishen_wx
-            ) if jishen_wx else {
-                'relation': '无特殊关系',
-                'jixi': '平',
-                'degree': 3,
-                'description': '运势平稳',
-                'tags': ['运势平稳']
-            }
-            
-            # 忌神关系要反过来看
-            if jishen_relation['jixi'] == '大吉':
-                jishen_result = {
-                    'relation': '流年生忌神',
-                    'jixi': '凶',
-                    'degree': 2,
-                    'description': '忌神得力,运势差,易有灾祸',
-                    'tags': ['运势差', '压力大']
-                }
-            elif jishen_relation['jixi'] == '大凶':
-                jishen_result = {
-                    'relation': '流年克忌神',
-                    'jixi': '吉',
-                    'degree': 4,
-                    'description': '忌神受制,运势转好,困扰减少',
-                    'tags': ['运势好转', '压力减轻']
-                }
-            else:
-                jishen_result = jishen_relation
-            
-            # 4. 检查冲克
-            bazi_sizhu_zhi = [
-                bazi.get('nian_zhu', {}).get('dizhi', ''),
-                bazi.get('yue_zhu', {}).get('dizhi', ''),
-                bazi.get('ri_zhu', {}).get('dizhi', ''),
-                bazi.get('shi_zhu', {}).get('dizhi', '')
-            ]
-            chong_list = self.check_chong(bazi_sizhu_zhi, liunian['zhi'])
-            
-            # 如果没有冲关系，返回一个明确的标识对象（保持数组结构）
-            if not chong_list:
-                chong_list = [{
-                    'has_chong': False,
-                    'status': 'no_chong',
-                    'message': '流年与命局四柱无冲关系',
-                    'liunian_zhi': liunian['zhi'],
-                    'bazi_sizhu_zhi': bazi_sizhu_zhi
-                }]
-            
-            # 5. 综合判断
-            total_score = (yongshen_result['degree'] * 0.6 + 
-                          jishen_result['degree'] * 0.4)
-            
-            if total_score >= 4:
-                overall = '吉'
-            elif total_score >= 3:
-                overall = '平'
-            else:
-                overall = '凶'
-            
-            return {
-                'liunian': liunian,
-                'yongshen_analysis': yongshen_result,
-                'jishen_analysis': jishen_result,
-                'chong_analysis': chong_list,
-                'total_score': round(total_score, 1),
-                'overall': overall
-            }
-        except Exception as e:
-            logger.error(f"流年分析失败: {e}")
-            raise CalculationError(f"流年分析失败: {e}")
-
+"""
+流年分析模块
+负责流年的计算和分析
+"""
+
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+from loguru import logger
+
+from .exceptions import CalculationError
+
+# DEBUG级别编号，用于在热路径上先判断再格式化日志
+_DEBUG_NO = logger.level("DEBUG").no
+
+
+# 五行生克关系
+_WUXING_SHENG = {'木': '火', '火': '土', '土': '金', '金': '水', '水': '木'}
+_WUXING_KE = {'木': '土', '火': '金', '土': '水', '金': '木', '水': '火'}
+_WUXING_SHENGKE = {'生': _WUXING_SHENG, '克': _WUXING_KE}
+
+# 天干五行
+_TIANGAN_WUXING = {
+    '甲': '木', '乙': '木',
+    '丙': '火', '丁': '火',
+    '戊': '土', '己': '土',
+    '庚': '金', '辛': '金',
+    '壬': '水', '癸': '水'
+}
+
+# 地支五行
+_DIZHI_WUXING = {
+    '子': '水', '亥': '水',
+    '寅': '木', '卯': '木',
+    '巳': '火', '午': '火',
+    '申': '金', '酉': '金',
+    '辰': '土', '戌': '土', '丑': '土', '未': '土'
+}
+
+# 六冲
+_LIUCHONG = {
+    '子': '午', '午': '子',
+    '丑': '未', '未': '丑',
+    '寅': '申', '申': '寅',
+    '卯': '酉', '酉': '卯',
+    '辰': '戌', '戌': '辰',
+    '巳': '亥', '亥': '巳'
+}
+
+# 四柱键名与位置名、冲克重要度(日柱最高、月柱次之)按位对应
+_ZHU_KEYS = ('nian_zhu', 'yue_zhu', 'ri_zhu', 'shi_zhu')
+_POSITIONS = ('年柱', '月柱', '日柱', '时柱')
+_IMPORTANCE_BY_POS = ('中', '高', '最高', '中')
+
+# 六冲对(无序关系展开成有序对，直接做成员测试)
+_CHONG_PAIRS = frozenset([
+    ('子', '午'), ('午', '子'),
+    ('丑', '未'), ('未', '丑'),
+    ('寅', '申'), ('申', '寅'),
+    ('卯', '酉'), ('酉', '卯'),
+    ('辰', '戌'), ('戌', '辰'),
+    ('巳', '亥'), ('亥', '巳')
+])
+
+# 流年与用神五行关系的五种固定结论。共享常量直接按引用返回，
+# 调用方只读取，不要就地修改（tags用元组防误改）
+_LIUNIAN_OUTCOMES = {
+    'sheng': {
+        'relation': '流年生用神',
+        'jixi': '大吉',
+        'degree': 5,
+        'description': '用神得力,运势极佳,贵人相助,事业顺利',
+        'tags': ('运势极佳', '贵人相助', '事业顺利')
+    },
+    'ke': {
+        'relation': '流年克用神',
+        'jixi': '大凶',
+        'degree': 1,
+        'description': '用神受制,运势低迷,事业受阻,易有灾祸',
+        'tags': ('运势差', '多阻碍', '诸事不顺')
+    },
+    'zhu': {
+        'relation': '流年助用神',
+        'jixi': '吉',
+        'degree': 4,
+        'description': '用神增强,运势上升,得朋友帮助',
+        'tags': ('运势良好', '朋友相助')
+    },
+    'xie': {
+        'relation': '流年泄用神',
+        'jixi': '小凶',
+        'degree': 2,
+        'description': '用神力量被泄,消耗较多,付出多收获少',
+        'tags': ('消耗大', '付出多')
+    },
+    'ping': {
+        'relation': '无特殊关系',
+        'jixi': '平',
+        'degree': 3,
+        'description': '运势平稳',
+        'tags': ('运势平稳',)
+    }
+}
+
+# 忌神视角需反转吉凶：生忌神为凶、克忌神为吉，其余结论照用
+_JISHEN_REVERSE = {
+    '大吉': {
+        'relation': '流年生忌神',
+        'jixi': '凶',
+        'degree': 2,
+        'description': '忌神得力,运势差,易有灾祸',
+        'tags': ('运势差', '压力大')
+    },
+    '大凶': {
+        'relation': '流年克忌神',
+        'jixi': '吉',
+        'degree': 4,
+        'description': '忌神受制,运势转好,困扰减少',
+        'tags': ('运势好转', '压力减轻')
+    }
+}
+
+
+# (流年五行, 目标五行) -> 关系类别，由生克表在导入时全量展开
+_RELATION_ID = {}
+for _a in '木火土金水':
+    for _b in '木火土金水':
+        if _WUXING_SHENG[_a] == _b:
+            _rel = 'sheng'
+        elif _WUXING_KE[_a] == _b:
+            _rel = 'ke'
+        elif _a == _b:
+            _rel = 'zhu'
+        else:
+            _rel = 'xie' if _WUXING_SHENG[_b] == _a else 'ping'
+        _RELATION_ID[(_a, _b)] = _rel
+del _a, _b, _rel
+
+# (关系类别, 是否忌神视角) -> 最终结论，忌神侧的生/克预先反转
+_OUTCOME_TABLE = {}
+for _rel, _outcome in _LIUNIAN_OUTCOMES.items():
+    _OUTCOME_TABLE[(_rel, False)] = _outcome
+    _OUTCOME_TABLE[(_rel, True)] = _JISHEN_REVERSE.get(_outcome['jixi'], _outcome)
+del _rel, _outcome
+
+
+# 冲克位置说明
+_CHONG_DESCRIPTIONS = {
+    '年柱': '父母、祖辈有变动,可能搬迁或家庭变化',
+    '月柱': '工作变动、跳槽、升职降职、兄弟姐妹事',
+    '日柱': '婚姻变动、离婚、结婚、配偶健康、搬家',
+    '时柱': '子女事、生育、子女离家、晚年变动'
+}
+
+
+@lru_cache(maxsize=256)
+def _check_chong(sizhu_zhi: tuple, liunian_zhi: str) -> tuple:
+    """检查流年地支冲哪些柱(纯函数，按参数缓存；流年扫描中最多12种流年地支)"""
+    chong_list = []
+    # f-string在loguru判级之前就会求值，热循环里先判一次级别再格式化
+    debug_on = logger._core.min_level <= _DEBUG_NO
+    
+    if debug_on:
+        logger.debug(f"检查冲关系: 命局四柱地支={sizhu_zhi}, 流年地支={liunian_zhi}")
+    
+    for i, zhi in enumerate(sizhu_zhi):
+        if (zhi, liunian_zhi) in _CHONG_PAIRS:
+            position = _POSITIONS[i]
+            if debug_on:
+                logger.debug(f"发现冲: {position}({zhi}) 被流年({liunian_zhi})冲")
+            chong_list.append({
+                'position': position,
+                'chong_zhi': zhi,
+                'importance': _IMPORTANCE_BY_POS[i],
+                'description': _CHONG_DESCRIPTIONS.get(position, '')
+            })
+    
+    if debug_on and not chong_list:
+        logger.debug(f"流年({liunian_zhi})与命局四柱无冲关系")
+    
+    return tuple(chong_list)
+
+
+def _extract_sizhu_zhi(bazi: Dict[str, Any]) -> tuple:
+    """从八字四柱字典中取出四个地支(元组，可哈希)"""
+    return tuple(bazi.get(key, {}).get('dizhi', '') for key in _ZHU_KEYS)
+
+
+@lru_cache(maxsize=128)
+def _get_year_ganzhi(year: int) -> tuple:
+    """按公历年份缓存流年干支(以该年1月1日所在农历年为准)"""
+    # 延迟导入：lunar_python加载大量静态表，不走流年路径时省下启动开销
+    from lunar_python import Solar
+    lunar = Solar.fromYmd(year, 1, 1).getLunar()
+    return lunar.getYearGan(), lunar.getYearZhi(), lunar.getYearInGanZhi()
+
+
+class LiunianAnalyzer:
+    """流年分析器"""
+    
+    __slots__ = ('wuxing_shengke', 'tiangan_wuxing', 'dizhi_wuxing', 'liuchong')
+    
+    def __init__(self):
+        # 常量表均在模块级共享，这里仅保留别名兼容旧引用
+        self.wuxing_shengke = _WUXING_SHENGKE
+        self.tiangan_wuxing = _TIANGAN_WUXING
+        self.dizhi_wuxing = _DIZHI_WUXING
+        self.liuchong = _LIUCHONG
+    
+    def get_liunian_info(self, year: int) -> Dict[str, Any]:
+        """获取流年信息"""
+        try:
+            year_gan, year_zhi, year_ganzhi = _get_year_ganzhi(year)
+            
+            return {
+                'year': year,
+                'ganzhi': year_ganzhi,
+                'gan': year_gan,
+                'zhi': year_zhi,
+                'gan_wuxing': _TIANGAN_WUXING.get(year_gan, ''),
+                'zhi_wuxing': _DIZHI_WUXING.get(year_zhi, '')
+            }
+        except Exception as e:
+            logger.error(f"获取流年信息失败: {e}")
+            raise CalculationError(f"获取流年信息失败: {e}")
+    
+    def analyze_liunian_yongshen(self, liunian_wuxing: str, yongshen_wuxing: str) -> Dict[str, Any]:
+        """分析流年与用神关系"""
+        relation_id = _RELATION_ID.get((liunian_wuxing, yongshen_wuxing), 'ping')
+        return _OUTCOME_TABLE[(relation_id, False)]
+    
+    def check_chong(self, bazi_sizhu_zhi: List[str], liunian_zhi: str) -> List[Dict[str, Any]]:
+        """检查流年是否冲命局(结果缓存，内部字典请勿就地修改)"""
+        return list(_check_chong(tuple(bazi_sizhu_zhi), liunian_zhi))
+    
+    def _get_chong_description(self, position: str) -> str:
+        """获取冲的描述"""
+        return _CHONG_DESCRIPTIONS.get(position, '')
+    
+    def analyze_liunian_range(self, start_year: int, end_year: int, bazi: Dict[str, Any],
+                              yongshen_wuxing: List[str], jishen_wuxing: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量分析多个流年(含首尾年份)
+        
+        四柱地支只解包一次，逐年复用，适合几十年跨度的流年扫描。
+        """
+        sizhu_zhi = _extract_sizhu_zhi(bazi)
+        return [
+            self.analyze_liunian(year, bazi, yongshen_wuxing, jishen_wuxing,
+                                 sizhu_zhi=sizhu_zhi)
+            for year in range(start_year, end_year + 1)
+        ]
+    
+    def analyze_liunian(self, year: int, bazi: Dict[str, Any], 
+                       yongshen_wuxing: List[str], jishen_wuxing: List[str],
+                       sizhu_zhi: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        综合分析流年
+        
+        参数:
+        - year: 流年年份
+        - bazi: 八字四柱 {'nian_zhu': {'dizhi': ''}, ...}
+        - yongshen_wuxing: 用神五行列表
+        - jishen_wuxing: 忌神五行列表
+        - sizhu_zhi: 预先取好的四柱地支（逐年循环调用时可避免重复解包 bazi）
+        """
+        try:
+            # 1. 获取流年信息
+            liunian = self.get_liunian_info(year)
+            
+            # 2/3. 流年天干五行对用神、忌神各查一次结论表
+            # (缺用神/忌神时查不到关系对，落到'ping'，即原先的"运势平稳"兜底)
+            gan_wx = liunian['gan_wuxing']
+            yongshen_wx = yongshen_wuxing[0] if yongshen_wuxing else ''
+            jishen_wx = jishen_wuxing[0] if jishen_wuxing else ''
+            yongshen_result = _OUTCOME_TABLE[
+                (_RELATION_ID.get((gan_wx, yongshen_wx), 'ping'), False)
+            ]
+            # 忌神侧的吉凶在建表时已反转
+            jishen_result = _OUTCOME_TABLE[
+                (_RELATION_ID.get((gan_wx, jishen_wx), 'ping'), True)
+            ]
+            
+            # 4. 检查冲克
+            bazi_sizhu_zhi = sizhu_zhi if sizhu_zhi is not None else _extract_sizhu_zhi(bazi)
+            chong_list = self.check_chong(bazi_sizhu_zhi, liunian['zhi'])
+            
+            # 如果没有冲关系，返回一个明确的标识对象（保持数组结构）
+            if not chong_list:
+                chong_list = [{
+                    'has_chong': False,
+                    'status': 'no_chong',
+                    'message': '流年与命局四柱无冲关系',
+                    'liunian_zhi': liunian['zhi'],
+                    'bazi_sizhu_zhi': bazi_sizhu_zhi
+                }]
+            
+            # 5. 综合判断
+            total_score = (yongshen_result['degree'] * 0.6 + 
+                          jishen_result['degree'] * 0.4)
+            
+            if total_score >= 4:
+                overall = '吉'
+            elif total_score >= 3:
+                overall = '平'
+            else:
+                overall = '凶'
+            
+            return {
+                'liunian': liunian,
+                'yongshen_analysis': yongshen_result,
+                'jishen_analysis': jishen_result,
+                'chong_analysis': chong_list,
+                'total_score': round(total_score, 1),
+                'overall': overall
+            }
+        except Exception as e:
+            logger.error(f"流年分析失败: {e}")
+            raise CalculationError(f"流年分析失败: {e}")
+
@@ -3,24 +3,376 @@ LLM集成模块
 负责调用大语言模型生成解读报告
 """
 
+import asyncio
+import hashlib
+import io
+import json
+import random
+import threading
 import time
-from typing import Dict, Any, Optional, List
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, Iterator, Optional, List
 from loguru import logger
 
+# 语义缓存的可选依赖：未安装时语义缓存不可用，不影响其它功能
 try:
-    from anthropic import Anthropic
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
 except ImportError:
-    Anthropic = None
+    np = None
+    SentenceTransformer = None
 
 try:
-    from openai import OpenAI
+    import faiss
 except ImportError:
-    OpenAI = None
+    faiss = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 from .exceptions import LLMAPIError
 from .config import LLMConfig, AnalysisConfig
 
 
+@lru_cache(maxsize=None)
+def _anthropic_classes() -> tuple:
+    """按需导入anthropic SDK，返回(同步, 异步)客户端类
+    
+    SDK导入要几十到上百毫秒，放到首次建客户端时做，只用OpenAI兼容
+    接口的进程完全不加载anthropic。
+    """
+    try:
+        from anthropic import Anthropic, AsyncAnthropic
+    except ImportError:
+        raise LLMAPIError("anthropic库未安装，请运行: pip install anthropic")
+    return Anthropic, AsyncAnthropic
+
+
+@lru_cache(maxsize=None)
+def _openai_classes() -> tuple:
+    """按需导入openai SDK，返回(同步, 异步)客户端类"""
+    try:
+        from openai import OpenAI, AsyncOpenAI
+    except ImportError:
+        raise LLMAPIError("openai库未安装，请运行: pip install openai")
+    return OpenAI, AsyncOpenAI
+
+
+class SemanticCache:
+    """语义响应缓存
+    
+    将提示词嵌入为归一化向量，按余弦相似度召回已有响应；
+    相同八字、仅个别字段不同的提示词可以共享一次LLM调用。
+    """
+    
+    def __init__(self, model_name: str, threshold: float):
+        """
+        初始化语义缓存
+        
+        Args:
+            model_name: sentence-transformers嵌入模型名
+            threshold: 命中所需的最低余弦相似度
+        """
+        if SentenceTransformer is None:
+            raise LLMAPIError("sentence-transformers库未安装，请运行: pip install sentence-transformers")
+        self.threshold = threshold
+        self.model = SentenceTransformer(model_name)
+        dim = self.model.get_sentence_embedding_dimension()
+        # faiss可用时用内积索引，否则退化为numpy暴力检索
+        self.index = faiss.IndexFlatIP(dim) if faiss is not None else None
+        self.vectors: List[Any] = []
+        self.responses: List[str] = []
+    
+    def _embed(self, prompt: str):
+        """嵌入并L2归一化，内积即余弦相似度"""
+        return self.model.encode([prompt], normalize_embeddings=True)
+    
+    def lookup(self, prompt: str):
+        """
+        查询最相似的已缓存响应
+        
+        Returns:
+            (嵌入向量, 响应或None)，向量可传回store避免二次嵌入
+        """
+        vec = self._embed(prompt)
+        if not self.responses:
+            return vec, None
+        if self.index is not None:
+            scores, ids = self.index.search(vec, 1)
+            score, idx = float(scores[0][0]), int(ids[0][0])
+        else:
+            sims = np.vstack(self.vectors) @ vec[0]
+            idx = int(sims.argmax())
+            score = float(sims[idx])
+        if score >= self.threshold:
+            return vec, self.responses[idx]
+        return vec, None
+    
+    def store(self, vec, response: str) -> None:
+        """写入一条(向量, 响应)记录"""
+        if self.index is not None:
+            self.index.add(vec)
+        else:
+            self.vectors.append(vec[0])
+        self.responses.append(response)
+
+
+# 提示词的静态前缀：指令与格式要求放在最前、动态字段放在最后，
+# 这样服务端提示词缓存(Anthropic cache_control / OpenAI自动前缀缓存)
+# 能命中整段说明文字，只有末尾的用户数据重新计费
+_PROMPT_STATIC_TEMPLATE = """你是一位资深的命理分析专家，请根据末尾提供的八字信息，生成一份{level}的专业命理分析报告，包括：
+1. 综合分析（性格、能力、运势）
+2. 各维度详细解读（事业、财运、婚姻、健康等）
+3. 个性化建议
+
+要求：
+- 语言专业但易懂
+- 内容积极正面
+- 避免绝对化表述
+- 提供实用建议
+
+"""
+
+# 连接类错误按异常类型名识别，避免为拿异常类而急加载各SDK，
+# 也免去重试热路径里的多次子串扫描
+_CONNECTION_ERROR_NAMES = frozenset({
+    "ConnectError", "ConnectTimeout", "APIConnectionError",
+    "APITimeoutError", "ConnectionError", "ConnectionResetError"
+})
+
+_DEBUG_NO = logger.level("DEBUG").no
+
+# 各解读级别的输出token上限：简短报告不必按全局max_tokens预留，
+# 输出token主导生成耗时与费用，按需封顶可线性缩短短报告的延迟
+_LEVEL_MAX_TOKENS = {
+    "simple": 800,
+    "normal": 1500,
+    "detailed": 3000,
+    "comprehensive": 6000
+}
+
+# 动态载荷模板：进程内只构建一次，渲染时用扁平字典一次format_map，
+# 省去每次调用里成串的嵌套.get()查找
+_PROMPT_PAYLOAD_TEMPLATE = """用户信息：
+姓名：{name}
+性别：{gender}
+出生时间：{birth_year}年{birth_month}月{birth_day}日
+
+八字信息：
+年柱：{nian_gan}{nian_zhi}
+月柱：{yue_gan}{yue_zhi}
+日柱：{ri_gan}{ri_zhi}
+时柱：{shi_gan}{shi_zhi}
+
+五行分析：
+最旺五行：{wuxing_most}
+缺失五行：{wuxing_missing}
+日主旺衰：{rizhu_status}
+用神：{yongshen}
+
+格局分析：
+格局类型：{geju_type}
+格局层次：{geju_level}
+"""
+
+
+class RateLimiter:
+    """客户端限速器（滑动窗口）
+    
+    在请求发出前按RPM/TPM配额预先等待，把429挡在客户端，避免触发
+    服务端限流后的长退避。窗口内记录(时间戳, 预估token数)，超配额时
+    等最早的记录滑出60秒窗口。
+    """
+    
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        """
+        初始化限速器
+        
+        Args:
+            rpm: 每分钟请求数上限，None表示不限
+            tpm: 每分钟token数上限，None表示不限
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._lock = threading.Lock()
+        self._events: deque = deque()
+    
+    def _wait_time(self, tokens: int) -> float:
+        """计算需等待的秒数，0表示可立即放行（调用方需持有锁）"""
+        now = time.monotonic()
+        while self._events and now - self._events[0][0] >= 60:
+            self._events.popleft()
+        
+        wait = 0.0
+        if self.rpm and len(self._events) >= self.rpm:
+            # 等第rpm新的那条记录滑出窗口
+            wait = max(wait, 60 - (now - self._events[-self.rpm][0]))
+        if self.tpm and self._events:
+            total = sum(t for _, t in self._events)
+            if total + tokens > self.tpm:
+                wait = max(wait, 60 - (now - self._events[0][0]))
+        return wait
+    
+    def acquire(self, tokens: int) -> None:
+        """阻塞等待直到配额允许发出一次请求"""
+        while True:
+            with self._lock:
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    self._events.append((time.monotonic(), tokens))
+                    return
+            logger.debug(f"触发客户端限速，等待{wait:.1f}秒")
+            time.sleep(wait)
+    
+    async def acquire_async(self, tokens: int) -> None:
+        """acquire的异步版本，等待时不阻塞事件循环"""
+        while True:
+            with self._lock:
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    self._events.append((time.monotonic(), tokens))
+                    return
+            logger.debug(f"触发客户端限速，等待{wait:.1f}秒")
+            await asyncio.sleep(wait)
+
+
+class BatchProcessor:
+    """离线批量任务处理器
+    
+    走OpenAI Batch API / Anthropic Message Batches API：任务提交后由服务端
+    异步排队，适合不赶时间的批量报告，成本约为实时接口的一半，且不占用
+    实时RPM配额。用法：submit提交全部提示词，poll轮询状态，fetch取回结果。
+    """
+    
+    def __init__(self, llm_config: LLMConfig):
+        """
+        初始化批量处理器
+        
+        Args:
+            llm_config: LLM配置(使用同步客户端)
+        """
+        self.llm_config = llm_config
+        
+        if llm_config.provider == "anthropic":
+            anthropic_cls, _ = _anthropic_classes()
+            self.client = anthropic_cls(api_key=llm_config.api_key)
+        elif llm_config.provider in ["openai", "yunwu", "custom"]:
+            openai_cls, _ = _openai_classes()
+            client_kwargs = {"api_key": llm_config.api_key, "timeout": llm_config.timeout}
+            if llm_config.base_url:
+                client_kwargs["base_url"] = llm_config.base_url
+            self.client = openai_cls(**client_kwargs)
+        else:
+            raise LLMAPIError(f"不支持的LLM提供商: {llm_config.provider}")
+    
+    def _request_body(self, prompt: str) -> Dict[str, Any]:
+        """单条请求的公共参数"""
+        return {
+            "model": self.llm_config.model,
+            "max_tokens": self.llm_config.max_tokens,
+            "temperature": self.llm_config.temperature,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    
+    def submit(self, prompts: List[str]) -> str:
+        """
+        提交批量任务
+        
+        Args:
+            prompts: 提示词列表
+            
+        Returns:
+            批量任务ID
+        """
+        if self.llm_config.provider == "anthropic":
+            batch = self.client.messages.batches.create(requests=[
+                {"custom_id": f"req-{i}", "params": self._request_body(prompt)}
+                for i, prompt in enumerate(prompts)
+            ])
+            return batch.id
+        
+        # OpenAI Batch API：上传jsonl任务文件后建批
+        lines = [
+            json.dumps({
+                "custom_id": f"req-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._request_body(prompt)
+            }, ensure_ascii=False)
+            for i, prompt in enumerate(prompts)
+        ]
+        batch_file = self.client.files.create(
+            file=io.BytesIO("\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"批量任务已提交: {batch.id}, 共{len(prompts)}条")
+        return batch.id
+    
+    def poll(self, batch_id: str) -> str:
+        """查询批量任务状态"""
+        if self.llm_config.provider == "anthropic":
+            return self.client.messages.batches.retrieve(batch_id).processing_status
+        return self.client.batches.retrieve(batch_id).status
+    
+    def fetch(self, batch_id: str) -> List[str]:
+        """
+        取回已完成批量任务的响应文本
+        
+        Returns:
+            按提交顺序排列的响应列表
+        """
+        if self.llm_config.provider == "anthropic":
+            indexed = {}
+            for result in self.client.messages.batches.results(batch_id):
+                index = int(result.custom_id.split("-")[1])
+                indexed[index] = result.result.message.content[0].text
+            return [indexed[i] for i in sorted(indexed)]
+        
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status != "completed":
+            raise LLMAPIError(f"批量任务尚未完成: {batch.status}")
+        content = self.client.files.content(batch.output_file_id).text
+        indexed = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            index = int(record["custom_id"].split("-")[1])
+            indexed[index] = record["response"]["body"]["choices"][0]["message"]["content"]
+        return [indexed[i] for i in sorted(indexed)]
+
+
+# 进程内共享的httpx异步客户端池，按(provider, base_url)复用，避免每个
+# LLMGenerator实例各建一套TCP/TLS连接
+_shared_http_clients: Dict[tuple, Any] = {}
+
+
+def _get_shared_http_client(llm_config: LLMConfig):
+    """获取(或创建)带连接池限额的共享httpx.AsyncClient，httpx缺失时返回None"""
+    if httpx is None:
+        return None
+    key = (llm_config.provider, llm_config.base_url)
+    client = _shared_http_clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=llm_config.max_connections,
+                max_keepalive_connections=llm_config.max_keepalive
+            ),
+            timeout=llm_config.timeout
+        )
+        _shared_http_clients[key] = client
+    return client
+
+
 class LLMGenerator:
     """LLM生成器"""
     
@@ -35,26 +387,66 @@ class LLMGenerator:
         self.llm_config = llm_config
         self.analysis_config = analysis_config or AnalysisConfig()
         self.client = self._create_client()
+        # 静态前缀在进程内不变，构建一次供_build_prompt与消息拆分复用
+        self._prompt_static = _PROMPT_STATIC_TEMPLATE.format(
+            level=self.analysis_config.llm_interpretation_level
+        )
+        # 输出token按解读级别封顶，analysis配置可显式覆盖
+        level_cap = self.analysis_config.max_output_tokens
+        if level_cap is None:
+            level_cap = _LEVEL_MAX_TOKENS.get(self.analysis_config.llm_interpretation_level)
+        if level_cap is not None:
+            self._max_tokens = min(llm_config.max_tokens, level_cap)
+        else:
+            self._max_tokens = llm_config.max_tokens
+        # 响应缓存：仅temperature=0的确定性请求参与，键为请求参数的SHA-256
+        self._response_cache: Dict[str, tuple] = {}
+        self.cache_stats = {"hits": 0, "misses": 0}
+        
+        # 级联统计：小模型命中/升级次数，便于调优阈值
+        self.cascade_stats = {"small_hits": 0, "escalations": 0}
+        # 客户端限速（配置了rpm/tpm才启用）
+        if llm_config.rpm or llm_config.tpm:
+            self._rate_limiter = RateLimiter(llm_config.rpm, llm_config.tpm)
+        else:
+            self._rate_limiter = None
+        # 语义缓存按配置开启(需要可选依赖)
+        self._semantic_cache = None
+        if getattr(llm_config, "semantic_cache_enabled", False):
+            self._semantic_cache = SemanticCache(
+                llm_config.embedding_model,
+                llm_config.semantic_threshold
+            )
     
     def _create_client(self):
-        """创建LLM客户端"""
+        """创建LLM客户端(async_mode=True时创建异步客户端，配合agenerate_interpretation使用)"""
+        async_mode = getattr(self.llm_config, "async_mode", False)
+        
+        # 异步模式下注入共享连接池，同一(provider, base_url)的实例复用长连接
+        http_client = _get_shared_http_client(self.llm_config) if async_mode else None
+        
         if self.llm_config.provider == "anthropic":
-            if Anthropic is None:
-                raise LLMAPIError("anthropic库未安装，请运行: pip install anthropic")
-            return Anthropic(api_key=self.llm_config.api_key)
+            sync_cls, async_cls = _anthropic_classes()
+            anthropic_cls = async_cls if async_mode else sync_cls
+            anthropic_kwargs = {"api_key": self.llm_config.api_key}
+            if http_client is not None:
+                anthropic_kwargs["http_client"] = http_client
+            return anthropic_cls(**anthropic_kwargs)
         
         elif self.llm_config.provider in ["openai", "yunwu", "custom"]:
             # yunwu和custom都使用OpenAI兼容的API格式
-            if OpenAI is None:
-                raise LLMAPIError("openai库未安装，请运行: pip install openai")
+            sync_cls, async_cls = _openai_classes()
+            openai_cls = async_cls if async_mode else sync_cls
             client_kwargs = {
                 "api_key": self.llm_config.api_key,
                 "timeout": self.llm_config.timeout
             }
             if self.llm_config.base_url:
                 client_kwargs["base_url"] = self.llm_config.base_url
-            logger.debug(f"创建OpenAI客户端: base_url={self.llm_config.base_url}, timeout={self.llm_config.timeout}")
-            return OpenAI(**client_kwargs)
+            if http_client is not None:
+                client_kwargs["http_client"] = http_client
+            logger.debug(f"创建OpenAI客户端: base_url={self.llm_config.base_url}, timeout={self.llm_config.timeout}, async={async_mode}")
+            return openai_cls(**client_kwargs)
         
         else:
             raise LLMAPIError(f"不支持的LLM提供商: {self.llm_config.provider}")
@@ -94,81 +486,340 @@ class LLMGenerator:
                 raise LLMAPIError(f"LLM调用失败，已重试{self.llm_config.max_retries}次: {e}")
             return {}
     
+    async def agenerate_interpretations_batch(self, analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        并发批量生成多份解读报告
+        
+        按batch_size分块gather，避免一次compose过多并发请求。
+        
+        Args:
+            analyses: 多份分析结果数据
+            
+        Returns:
+            与输入等长的解读字典列表
+        """
+        batch_size = getattr(self.llm_config, "batch_size", 10)
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(analyses), batch_size):
+            chunk = analyses[start:start + batch_size]
+            results.extend(await asyncio.gather(
+                *[self.agenerate_interpretation(data) for data in chunk]
+            ))
+        return results
+    
+    def generate_interpretations_batch(self, analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量生成多份解读报告(同步入口)
+        
+        async_mode客户端下起事件循环并发执行；同步客户端退化为逐份生成。
+        """
+        if getattr(self.llm_config, "async_mode", False):
+            return asyncio.run(self.agenerate_interpretations_batch(analyses))
+        return [self.generate_interpretation(data) for data in analyses]
+    
+    def generate_interpretation_stream(self, analysis_data: Dict[str, Any]) -> Iterator[str]:
+        """
+        流式生成解读报告
+        
+        以生成器形式逐段产出响应文本，首个片段到达即可开始渲染，
+        不必等完整补全。总token不变，但感知延迟大幅下降。完整文本
+        仍会写入响应缓存，缓存命中时一次性产出全文。
+        
+        Args:
+            analysis_data: 分析结果数据
+            
+        Yields:
+            响应文本片段
+        """
+        if not self.analysis_config.include_llm_interpretation:
+            return
+        
+        prompt = self._build_prompt(analysis_data)
+        cache_key, semantic_vec, cached = self._cache_lookup(prompt)
+        if cached is not None:
+            yield cached
+            return
+        
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(self._estimate_tokens(prompt))
+        
+        pieces: List[str] = []
+        try:
+            if self.llm_config.provider == "anthropic":
+                with self.client.messages.stream(
+                    model=self.llm_config.model,
+                    max_tokens=self._max_tokens,
+                    temperature=self.llm_config.temperature,
+                    messages=self._anthropic_messages(prompt)
+                ) as stream:
+                    for text in stream.text_stream:
+                        pieces.append(text)
+                        yield text
+            
+            elif self.llm_config.provider in ["openai", "yunwu", "custom"]:
+                response = self.client.chat.completions.create(
+                    model=self.llm_config.model,
+                    max_tokens=self._max_tokens,
+                    temperature=self.llm_config.temperature,
+                    messages=self._openai_messages(prompt),
+                    timeout=self.llm_config.timeout,
+                    stream=True
+                )
+                for chunk in response:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        pieces.append(delta)
+                        yield delta
+            
+            else:
+                raise LLMAPIError(f"不支持的LLM提供商: {self.llm_config.provider}")
+        
+        except LLMAPIError:
+            raise
+        except Exception as e:
+            self._log_call_failure(e, 0)
+            raise LLMAPIError(f"LLM流式调用失败: {type(e).__name__}: {e}")
+        
+        self._cache_store(cache_key, semantic_vec, "".join(pieces))
+    
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        """计算响应缓存键；temperature>0时响应非确定，返回None表示不缓存"""
+        config = self.llm_config
+        if config.temperature > 0:
+            return None
+        payload = json.dumps({
+            "model": config.model,
+            "prompt": prompt,
+            "temperature": config.temperature,
+            "max_tokens": self._max_tokens
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    async def generate_interpretation_async(self, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        generate_interpretation的异步版本
+        
+        LLM调用放入线程池执行，不阻塞事件循环，便于并发分析多个命盘。
+        
+        Args:
+            analysis_data: 分析结果数据
+            
+        Returns:
+            包含LLM解读的字典
+        """
+        return await asyncio.to_thread(self.generate_interpretation, analysis_data)
+    
+    async def agenerate_interpretation(self, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        原生异步生成解读报告
+        
+        需要async_mode=True创建的异步客户端；多份报告可用asyncio.gather并发。
+        
+        Args:
+            analysis_data: 分析结果数据
+            
+        Returns:
+            包含LLM解读的字典
+        """
+        if not self.analysis_config.include_llm_interpretation:
+            return {}
+        
+        try:
+            prompt = self._build_prompt(analysis_data)
+            response = await self._acall_llm_with_retry(prompt)
+            interpretation = self._parse_response(response)
+            
+            return {
+                "comprehensive_analysis": interpretation.get("comprehensive", ""),
+                "detailed_interpretation": interpretation.get("detailed", {}),
+                "suggestions": interpretation.get("suggestions", [])
+            }
+        
+        except Exception as e:
+            logger.error(f"LLM调用失败: {e}")
+            if self.llm_config.max_retries > 0:
+                raise LLMAPIError(f"LLM调用失败，已重试{self.llm_config.max_retries}次: {e}")
+            return {}
+    
     def _build_prompt(self, analysis_data: Dict[str, Any]) -> str:
-        """构建提示词"""
+        """构建提示词（静态指令在前，用户数据在后，便于服务端前缀缓存）"""
         user_info = analysis_data.get("user_basic_info", {})
         bazi_info = analysis_data.get("bazi_basic", {})
         wuxing = analysis_data.get("wuxing_analysis", {})
         shishen = analysis_data.get("shishen_analysis", {})
         geju = analysis_data.get("geju_analysis", {})
         
-        prompt = f"""你是一位资深的命理分析专家，请根据以下八字信息，生成一份专业的命理分析报告。
-
-用户信息：
-姓名：{user_info.get('name', '')}
-性别：{user_info.get('gender', '')}
-出生时间：{user_info.get('birth_year', '')}年{user_info.get('birth_month', '')}月{user_info.get('birth_day', '')}日
-
-八字信息：
-年柱：{bazi_info.get('nian_zhu', {}).get('tiangan', '')}{bazi_info.get('nian_zhu', {}).get('dizhi', '')}
-月柱：{bazi_info.get('yue_zhu', {}).get('tiangan', '')}{bazi_info.get('yue_zhu', {}).get('dizhi', '')}
-日柱：{bazi_info.get('ri_zhu', {}).get('tiangan', '')}{bazi_info.get('ri_zhu', {}).get('dizhi', '')}
-时柱：{bazi_info.get('shi_zhu', {}).get('tiangan', '')}{bazi_info.get('shi_zhu', {}).get('dizhi', '')}
-
-五行分析：
-最旺五行：{wuxing.get('wuxing_most', '')}
-缺失五行：{wuxing.get('wuxing_missing', [])}
-日主旺衰：{wuxing.get('rizhu_status', '')}
-用神：{wuxing.get('yongshen', [])}
-
-格局分析：
-格局类型：{geju.get('geju_type', '')}
-格局层次：{geju.get('geju_level', '')}
-
-请生成一份{self.analysis_config.llm_interpretation_level}的命理分析报告，包括：
-1. 综合分析（性格、能力、运势）
-2. 各维度详细解读（事业、财运、婚姻、健康等）
-3. 个性化建议
-
-要求：
-- 语言专业但易懂
-- 内容积极正面
-- 避免绝对化表述
-- 提供实用建议
-"""
-        return prompt
+        # 嵌套字段各取一次，展平后交给预编译模板渲染
+        nian = bazi_info.get("nian_zhu", {})
+        yue = bazi_info.get("yue_zhu", {})
+        ri = bazi_info.get("ri_zhu", {})
+        shi = bazi_info.get("shi_zhu", {})
+        payload = _PROMPT_PAYLOAD_TEMPLATE.format_map({
+            "name": user_info.get("name", ""),
+            "gender": user_info.get("gender", ""),
+            "birth_year": user_info.get("birth_year", ""),
+            "birth_month": user_info.get("birth_month", ""),
+            "birth_day": user_info.get("birth_day", ""),
+            "nian_gan": nian.get("tiangan", ""), "nian_zhi": nian.get("dizhi", ""),
+            "yue_gan": yue.get("tiangan", ""), "yue_zhi": yue.get("dizhi", ""),
+            "ri_gan": ri.get("tiangan", ""), "ri_zhi": ri.get("dizhi", ""),
+            "shi_gan": shi.get("tiangan", ""), "shi_zhi": shi.get("dizhi", ""),
+            "wuxing_most": wuxing.get("wuxing_most", ""),
+            "wuxing_missing": wuxing.get("wuxing_missing", []),
+            "rizhu_status": wuxing.get("rizhu_status", ""),
+            "yongshen": wuxing.get("yongshen", []),
+            "geju_type": geju.get("geju_type", ""),
+            "geju_level": geju.get("geju_level", "")
+        })
+        return self._prompt_static + payload
+    
+    def _anthropic_messages(self, prompt: str) -> List[Dict[str, Any]]:
+        """拆出静态前缀并打上cache_control，让Anthropic按缓存费率计费前缀"""
+        if prompt.startswith(self._prompt_static):
+            return [{
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": self._prompt_static,
+                        "cache_control": {"type": "ephemeral"}
+                    },
+                    {"type": "text", "text": prompt[len(self._prompt_static):]}
+                ]
+            }]
+        return [{"role": "user", "content": prompt}]
+    
+    def _openai_messages(self, prompt: str) -> List[Dict[str, str]]:
+        """静态前缀作为首条system消息，OpenAI对稳定前缀自动启用缓存"""
+        if prompt.startswith(self._prompt_static):
+            return [
+                {"role": "system", "content": self._prompt_static},
+                {"role": "user", "content": prompt[len(self._prompt_static):]}
+            ]
+        return [{"role": "user", "content": prompt}]
+    
+    def _cache_lookup(self, prompt: str) -> tuple:
+        """依次查精确缓存与语义缓存，返回(精确键, 语义向量, 命中内容或None)"""
+        cache_key = self._cache_key(prompt)
+        if cache_key is not None:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                expire_ts, content = cached
+                if expire_ts is None or expire_ts > time.time():
+                    self.cache_stats["hits"] += 1
+                    logger.debug(f"LLM响应缓存命中: hits={self.cache_stats['hits']}, misses={self.cache_stats['misses']}")
+                    return cache_key, None, content
+                # 过期清除
+                del self._response_cache[cache_key]
+            self.cache_stats["misses"] += 1
+        
+        # 精确缓存未命中时尝试语义缓存(近似提示词共享响应)
+        semantic_vec = None
+        if self._semantic_cache is not None:
+            semantic_vec, cached_response = self._semantic_cache.lookup(prompt)
+            if cached_response is not None:
+                self.cache_stats["hits"] += 1
+                logger.debug("LLM语义缓存命中")
+                return cache_key, semantic_vec, cached_response
+        
+        return cache_key, semantic_vec, None
+    
+    def _cache_store(self, cache_key: Optional[str], semantic_vec, content: str) -> None:
+        """把新响应写入精确缓存与语义缓存"""
+        if semantic_vec is not None:
+            self._semantic_cache.store(semantic_vec, content)
+        if cache_key is not None:
+            ttl = getattr(self.llm_config, "cache_ttl", 0)
+            expire_ts = time.time() + ttl if ttl else None
+            self._response_cache[cache_key] = (expire_ts, content)
     
     def _call_llm_with_retry(self, prompt: str) -> str:
-        """调用LLM，带重试机制"""
+        """调用LLM，带重试机制与确定性请求的响应缓存"""
+        cache_key, semantic_vec, cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
+        content = self._request_cascade(prompt)
+        self._cache_store(cache_key, semantic_vec, content)
+        return content
+    
+    async def _acall_llm_with_retry(self, prompt: str) -> str:
+        """_call_llm_with_retry的异步版本，共享同一套缓存"""
+        cache_key, semantic_vec, cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
+        content = await self._arequest_cascade(prompt)
+        self._cache_store(cache_key, semantic_vec, content)
+        return content
+    
+    def _estimate_tokens(self, prompt: str) -> int:
+        """粗估一次请求的token开销（提示词按4字符1个token，加上输出上限）"""
+        return len(prompt) // 4 + self._max_tokens
+    
+    def _validate_response(self, content: str) -> bool:
+        """校验响应是否达到可交付质量（长度与基本内容），不合格则升级大模型"""
+        if not content or len(content) < self.llm_config.cascade_min_length:
+            return False
+        return "分析" in content or "建议" in content
+    
+    def _request_cascade(self, prompt: str) -> str:
+        """模型级联：先试小模型，响应不合格再升级到配置的大模型"""
+        if self.llm_config.cascade_enabled and self.llm_config.small_model:
+            try:
+                content = self._request_with_retry(prompt, model=self.llm_config.small_model)
+                if self._validate_response(content):
+                    self.cascade_stats["small_hits"] += 1
+                    logger.debug(f"小模型响应合格: {self.cascade_stats}")
+                    return content
+            except LLMAPIError as e:
+                logger.warning(f"小模型调用失败，升级到大模型: {e}")
+            self.cascade_stats["escalations"] += 1
+            logger.info(f"级联升级到{self.llm_config.model}: {self.cascade_stats}")
+        return self._request_with_retry(prompt)
+    
+    async def _arequest_cascade(self, prompt: str) -> str:
+        """_request_cascade的异步版本"""
+        if self.llm_config.cascade_enabled and self.llm_config.small_model:
+            try:
+                content = await self._arequest_with_retry(prompt, model=self.llm_config.small_model)
+                if self._validate_response(content):
+                    self.cascade_stats["small_hits"] += 1
+                    logger.debug(f"小模型响应合格: {self.cascade_stats}")
+                    return content
+            except LLMAPIError as e:
+                logger.warning(f"小模型调用失败，升级到大模型: {e}")
+            self.cascade_stats["escalations"] += 1
+            logger.info(f"级联升级到{self.llm_config.model}: {self.cascade_stats}")
+        return await self._arequest_with_retry(prompt)
+    
+    def _request_with_retry(self, prompt: str, model: Optional[str] = None) -> str:
+        """实际发起LLM请求，带重试机制"""
         last_error = None
+        model = model or self.llm_config.model
+        
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(self._estimate_tokens(prompt))
         
         for attempt in range(self.llm_config.max_retries + 1):
             try:
                 if self.llm_config.provider == "anthropic":
                     response = self.client.messages.create(
-                        model=self.llm_config.model,
-                        max_tokens=self.llm_config.max_tokens,
+                        model=model,
+                        max_tokens=self._max_tokens,
                         temperature=self.llm_config.temperature,
-                        messages=[{
-                            "role": "user",
-                            "content": prompt
-                        }]
+                        messages=self._anthropic_messages(prompt)
                     )
                     return response.content[0].text
                 
                 elif self.llm_config.provider in ["openai", "yunwu", "custom"]:
                     # yunwu和custom都使用OpenAI兼容的API格式
-                    logger.debug(f"调用LLM API: provider={self.llm_config.provider}, model={self.llm_config.model}, base_url={self.llm_config.base_url}")
+                    logger.debug(f"调用LLM API: provider={self.llm_config.provider}, model={model}, base_url={self.llm_config.base_url}")
                     logger.debug(f"请求参数: max_tokens={self.llm_config.max_tokens}, temperature={self.llm_config.temperature}")
                     
                     response = self.client.chat.completions.create(
-                        model=self.llm_config.model,
-                        max_tokens=self.llm_config.max_tokens,
+                        model=model,
+                        max_tokens=self._max_tokens,
                         temperature=self.llm_config.temperature,
-                        messages=[{
-                            "role": "user",
-                            "content": prompt
-                        }],
+                        messages=self._openai_messages(prompt),
                         timeout=self.llm_config.timeout
                     )
                     logger.debug(f"LLM调用成功，响应长度: {len(response.choices[0].message.content) if response.choices else 0}")
@@ -176,37 +827,96 @@ class LLMGenerator:
                 
             except Exception as e:
                 last_error = e
-                error_type = type(e).__name__
-                error_msg = str(e)
+                self._log_call_failure(e, attempt)
                 
-                # 详细的错误信息
-                logger.error(f"LLM调用失败 (尝试 {attempt + 1}/{self.llm_config.max_retries + 1})")
-                logger.error(f"错误类型: {error_type}")
-                logger.error(f"错误信息: {error_msg}")
-                logger.error(f"API配置: provider={self.llm_config.provider}, base_url={self.llm_config.base_url}, model={self.llm_config.model}")
+                if attempt < self.llm_config.max_retries:
+                    wait_time = self._retry_wait(e, attempt)
+                    logger.warning(f"LLM调用失败，{wait_time:.1f}秒后重试 (尝试 {attempt + 1}/{self.llm_config.max_retries + 1})")
+                    time.sleep(wait_time)
+                else:
+                    raise LLMAPIError(f"LLM调用失败: {type(e).__name__}: {e}")
+        
+        raise LLMAPIError(f"LLM调用失败，已重试{self.llm_config.max_retries}次: {last_error}")
+    
+    async def _arequest_with_retry(self, prompt: str, model: Optional[str] = None) -> str:
+        """_request_with_retry的异步版本，等待异步客户端并用asyncio.sleep退避"""
+        last_error = None
+        model = model or self.llm_config.model
+        
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async(self._estimate_tokens(prompt))
+        
+        for attempt in range(self.llm_config.max_retries + 1):
+            try:
+                if self.llm_config.provider == "anthropic":
+                    response = await self.client.messages.create(
+                        model=model,
+                        max_tokens=self._max_tokens,
+                        temperature=self.llm_config.temperature,
+                        messages=self._anthropic_messages(prompt)
+                    )
+                    return response.content[0].text
                 
-                # 检查是否是连接错误
-                if "Connection" in error_type or "getaddrinfo" in error_msg or "Failed to resolve" in error_msg:
-                    logger.error("⚠️  网络连接问题：")
-                    logger.error("   1. 请检查网络连接")
-                    logger.error("   2. 请检查 base_url 是否正确")
-                    logger.error("   3. 请检查是否需要代理")
-                    logger.error(f"   4. 尝试访问: {self.llm_config.base_url}")
+                elif self.llm_config.provider in ["openai", "yunwu", "custom"]:
+                    response = await self.client.chat.completions.create(
+                        model=model,
+                        max_tokens=self._max_tokens,
+                        temperature=self.llm_config.temperature,
+                        messages=self._openai_messages(prompt),
+                        timeout=self.llm_config.timeout
+                    )
+                    return response.choices[0].message.content
                 
-                # 打印更详细的错误信息
-                if hasattr(e, 'response'):
-                    logger.error(f"响应状态码: {getattr(e.response, 'status_code', 'N/A')}")
-                    logger.error(f"响应内容: {getattr(e.response, 'text', 'N/A')}")
+            except Exception as e:
+                last_error = e
+                self._log_call_failure(e, attempt)
                 
                 if attempt < self.llm_config.max_retries:
-                    wait_time = self.llm_config.retry_delay * (attempt + 1)
-                    logger.warning(f"LLM调用失败，{wait_time}秒后重试 (尝试 {attempt + 1}/{self.llm_config.max_retries + 1})")
-                    time.sleep(wait_time)
+                    wait_time = self._retry_wait(e, attempt)
+                    logger.warning(f"LLM调用失败，{wait_time:.1f}秒后重试 (尝试 {attempt + 1}/{self.llm_config.max_retries + 1})")
+                    await asyncio.sleep(wait_time)
                 else:
-                    raise LLMAPIError(f"LLM调用失败: {error_type}: {error_msg}")
+                    raise LLMAPIError(f"LLM调用失败: {type(e).__name__}: {e}")
         
         raise LLMAPIError(f"LLM调用失败，已重试{self.llm_config.max_retries}次: {last_error}")
     
+    def _retry_wait(self, e: Exception, attempt: int) -> float:
+        """计算下次重试的等待秒数：指数退避加随机抖动，优先遵守Retry-After"""
+        # 服务端明确给出Retry-After时照办（常见于429限流）
+        response = getattr(e, "response", None)
+        if response is not None:
+            retry_after = getattr(response, "headers", {}).get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.llm_config.max_retry_delay)
+                except ValueError:
+                    pass
+        
+        # 指数退避避免所有重试同时打到服务端，抖动错开并发进程
+        delay = (2 ** attempt) * self.llm_config.retry_delay
+        delay += random.uniform(0, self.llm_config.retry_jitter)
+        return min(delay, self.llm_config.max_retry_delay)
+    
+    def _log_call_failure(self, e: Exception, attempt: int) -> None:
+        """输出一次LLM调用失败的日志（详细诊断仅DEBUG级别输出）"""
+        error_type = type(e).__name__
+        logger.error(f"LLM调用失败 (尝试 {attempt + 1}/{self.llm_config.max_retries + 1}): {error_type}: {e}")
+        
+        # 连接问题的排查提示只在首次失败打一次，故障风暴时不刷屏
+        if error_type in _CONNECTION_ERROR_NAMES and attempt == 0:
+            logger.error("⚠️  网络连接问题：")
+            logger.error("   1. 请检查网络连接")
+            logger.error("   2. 请检查 base_url 是否正确")
+            logger.error("   3. 请检查是否需要代理")
+            logger.error(f"   4. 尝试访问: {self.llm_config.base_url}")
+        
+        # 详细诊断放在DEBUG级别，重试热路径不做多余的字符串拼接与I/O
+        if logger._core.min_level <= _DEBUG_NO:
+            logger.debug(f"API配置: provider={self.llm_config.provider}, base_url={self.llm_config.base_url}, model={self.llm_config.model}")
+            if hasattr(e, 'response'):
+                logger.debug(f"响应状态码: {getattr(e.response, 'status_code', 'N/A')}")
+                logger.debug(f"响应内容: {getattr(e.response, 'text', 'N/A')}")
+    
     def _parse_response(self, response: str) -> Dict[str, Any]:
         """解析LLM响应"""
         # 简化处理，直接返回文本
